@@ -0,0 +1,74 @@
+# SPRITES OF THE GAME, LOADED ONCE
+# every image is scaled and converted to the window's pixel format when it's loaded, so blitting it
+# doesn't convert it again every frame. the sprites are packed side by side on one atlas surface and
+# handed out as subsurfaces of it. tinted copies of a sprite are kept by color, least recently used
+# first, so a chaser of a color seen before doesn't build its surface again.
+# the window has to be set up (pygame.display.set_mode) before anything is loaded
+from collections import OrderedDict
+
+import pygame
+
+
+# an image from disk, scaled to size and in the window's pixel format
+def load_image(path, size):
+    return pygame.transform.scale(pygame.image.load(path).convert_alpha(), size)
+
+
+class SpriteAtlas:
+    """Named sprites packed side by side on one surface."""
+
+    def __init__(self, sprites):
+        width = sum(sprite.get_width() for sprite in sprites.values())
+        height = max(sprite.get_height() for sprite in sprites.values())
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+        self.rects = {}
+        x = 0
+        for name, sprite in sprites.items():
+            # copied as is, alpha included, instead of blended onto the empty atlas
+            self.rects[name] = self.surface.blit(sprite, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += sprite.get_width()
+        self.sprites = {name: self.surface.subsurface(rect) for name, rect in self.rects.items()}
+
+    def __getitem__(self, name):
+        return self.sprites[name]
+
+
+class Assets:
+    """Every sprite of the game on one atlas, with tinted copies kept by color."""
+
+    def __init__(self, sprite_size, button_size, directory="static", max_tints=64):
+        sprite = (sprite_size, sprite_size)
+        button = (button_size, button_size)
+        right = load_image(f"{directory}/pacman.png", sprite)
+        left = pygame.transform.flip(right, True, False)
+        self.atlas = SpriteAtlas(
+            {
+                "playerR": right,
+                "playerU": pygame.transform.rotate(right, 90),
+                "playerL": left,
+                "playerD": pygame.transform.rotate(left, 90),
+                "chaser": load_image(f"{directory}/chaser.png", sprite),
+                "pause": load_image(f"{directory}/pause.png", button),
+                "play": load_image(f"{directory}/play.png", button),
+                "restart": load_image(f"{directory}/restart.png", button),
+            }
+        )
+        self.tints = OrderedDict()  # (name, color) -> tinted copy, least recently used first
+        self.max_tints = max_tints
+
+    def __getitem__(self, name):
+        return self.atlas[name]
+
+    # a copy of a sprite with every pixel multiplied by color, made the first time it's asked for
+    def tinted(self, name, color):
+        key = (name, tuple(color))
+        image = self.tints.get(key)
+        if image is None:
+            image = self.atlas[name].copy()
+            image.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+            self.tints[key] = image
+            while len(self.tints) > self.max_tints:
+                self.tints.popitem(last=False)
+        else:
+            self.tints.move_to_end(key)
+        return image
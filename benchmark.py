@@ -0,0 +1,414 @@
+# BENCHMARKS FOR THE MAZE ALGORITHMS. RUNS WITHOUT PYGAME OR A WINDOW
+# usage: python benchmark.py [name ...]   (no names runs everything)
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from queue import Queue as fifo
+
+import generators
+from chunked import ChunkedMaze
+from generators import GENERATORS, eller_rows
+from hierarchical import HPAGraph
+from junctions import JunctionGraph
+from maze_cache import MazeCache
+from maze_corpus import MazeCorpus, write_corpus
+import wavefront
+from maze_store import MazeStore
+from nexthop import NextHopTable
+from pathfinding import BOTTOM, LEFT, RIGHT, STRATEGIES, TOP, Searcher
+
+SIZES = (15, 50, 100, 250, 500, 1000)
+
+
+# a perfect maze made by the game's own dfs generator, as wall codes
+def dfs_maze(rows, cols, rng):
+    store = MazeStore(rows, cols)
+    GENERATORS["dfs"](store.cells, rows, cols, rng)
+    return bytearray(store.walls())
+
+
+# randomly knock down walls of the interior cells, the same way make_easy() does
+def easy_maze(walls, rows, cols, rng, difficulty=75):
+    generators.make_easy(walls, rows, cols, rng, difficulty)
+    return walls
+
+
+# the old make_easy(): a list of draws and up to four wall removals per cell
+def legacy_easy_maze(walls, rows, cols, rng, difficulty=75):
+    draws = int(4 * (100 - difficulty) / 100)
+    for i in range(1, rows - 1):
+        for j in range(1, cols - 1):
+            if 0 not in [rng.randint(0, 3) for _ in range(draws)]:
+                continue
+            k = i * cols + j
+            for bit, opposite, n in ((RIGHT, LEFT, k + 1), (LEFT, RIGHT, k - 1), (TOP, BOTTOM, k - cols), (BOTTOM, TOP, k + cols)):
+                if walls[k] & bit:
+                    walls[k] &= ~bit
+                    walls[n] &= ~opposite
+    return walls
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+
+# the old bfs: a locked queue and a list of searched cells, O(V^2)
+def legacy_first_step(walls, cols, start, end):
+    Q = fifo()
+    searched = [start]
+    Q.put(start)
+    track = {}
+    while True:
+        root = Q.get()
+        if root == end:
+            while track[root] != start:
+                root = track[root]
+            return root
+        w = walls[root]
+        for bit, n in ((RIGHT, root + 1), (BOTTOM, root + cols), (LEFT, root - 1), (TOP, root - cols)):
+            if not w & bit and n not in searched:
+                searched.append(n)
+                track[n] = root
+                Q.put(n)
+
+
+# corner to corner searches, the worst case for a chaser
+def bench_bfs():
+    print("bfs: corner to corner search, time per cell should stay flat")
+    print(f"{'size':>10} {'cells':>9} {'expanded':>9} {'first_step':>11} {'path':>9} {'us/cell':>8} {'legacy':>9}")
+    rng = random.Random(1)
+    for n in SIZES:
+        walls = dfs_maze(n, n, rng)
+        search = Searcher(walls, n, n)
+        _, t_step = timed(search.first_step, 0, n * n - 1)
+        expanded = search.expanded
+        _, t_path = timed(search.path, 0, n * n - 1)
+        legacy = ""
+        if n <= 100:
+            _, t_legacy = timed(legacy_first_step, walls, n, 0, n * n - 1)
+            legacy = f"{t_legacy:9.4f}"
+        print(
+            f"{n:>4}x{n:<5} {n * n:>9} {expanded:>9} {t_step:>11.4f} {t_path:>9.4f}"
+            f" {t_step / expanded * 1e6:>8.3f} {legacy:>9}"
+        )
+
+
+# memory and build time of the all pairs next hop table. memory grows with cells^2
+def bench_table():
+    print("table: all pairs next hop table, on mazes with loops, checked against bfs")
+    print(f"{'size':>10} {'cells':>9} {'memory':>12} {'build':>9} {'lookup us':>10} {'same as bfs':>12}")
+    rng = random.Random(1)
+    for n in (15, 25, 40, 60):
+        walls = easy_maze(dfs_maze(n, n, rng), n, n, rng)
+        table = NextHopTable(walls, n, n)
+        table.build()
+        queries = [(rng.randrange(n * n), rng.randrange(n * n)) for _ in range(10000)]
+        steps, t_lookup = timed(lambda: [table.step(s, t) for s, t in queries])
+        # ties between equally short paths are broken the same way, so every step matches
+        searcher = Searcher(walls, n, n)
+        same = sum(step == searcher.first_step(s, t) for step, (s, t) in zip(steps, queries))
+        assert same == len(queries), "next hop table and bfs step differently"
+        print(
+            f"{n:>4}x{n:<5} {n * n:>9} {table.nbytes / 1024 ** 2:>9.2f} MB"
+            f" {table.build_time:>9.3f} {t_lookup / len(queries) * 1e6:>10.3f}"
+            f" {same:>6}/{len(queries)}"
+        )
+    for n in (100, 250):
+        print(f"{n:>4}x{n:<5} {n * n:>9} {(n * n) ** 2 / 1024 ** 2:>9.2f} MB {'(not built)':>9}")
+
+
+# nodes expanded and time per search, junction graph against plain bfs
+def bench_junctions():
+    print("junctions: 200 random searches, junction graph against bfs")
+    print(
+        f"{'size':>10} {'maze':>8} {'cells':>9} {'nodes':>8} {'build':>8}"
+        f" {'bfs exp':>9} {'jg exp':>9} {'bfs ms':>8} {'jg ms':>8}"
+    )
+    rng = random.Random(1)
+    for n in (15, 50, 100, 250):
+        for kind in ("perfect", "easy 75", "easy 25"):
+            walls = dfs_maze(n, n, rng)
+            if kind != "perfect":
+                easy_maze(walls, n, n, rng, int(kind.split()[1]))
+            graph, t_build = timed(JunctionGraph, walls, n, n)
+            search = Searcher(walls, n, n)
+            queries = [(rng.randrange(n * n), rng.randrange(n * n)) for _ in range(200)]
+            bfs_exp = jg_exp = 0
+            t_bfs = t_jg = 0
+            for s, t in queries:
+                _, dt = timed(search.first_step, s, t)
+                t_bfs += dt
+                bfs_exp += search.expanded
+                _, dt = timed(graph.first_step, s, t)
+                t_jg += dt
+                jg_exp += graph.expanded
+            print(
+                f"{n:>4}x{n:<5} {kind:>8} {n * n:>9} {graph.nodes:>8} {t_build:>8.3f}"
+                f" {bfs_exp // len(queries):>9} {jg_exp // len(queries):>9}"
+                f" {t_bfs / len(queries) * 1e3:>8.3f} {t_jg / len(queries) * 1e3:>8.3f}"
+            )
+
+
+# every search strategy on the same queries. the more open the maze, the more the heuristic helps
+def bench_strategies():
+    print("strategies: 200 random searches per maze, average nodes expanded / ms per search")
+    strategies = dict(STRATEGIES, junctions=JunctionGraph)
+    print(f"{'size':>10} {'maze':>8}" + "".join(f" {name:>18}" for name in strategies))
+    rng = random.Random(1)
+    for n in (15, 50, 100, 250):
+        for kind in ("perfect", "easy 75", "easy 50", "easy 25"):
+            walls = dfs_maze(n, n, rng)
+            if kind != "perfect":
+                easy_maze(walls, n, n, rng, int(kind.split()[1]))
+            queries = [(rng.randrange(n * n), rng.randrange(n * n)) for _ in range(200)]
+            line = f"{n:>4}x{n:<5} {kind:>8}"
+            for strategy in strategies.values():
+                search = strategy(walls, n, n)
+                expanded = 0
+                start = time.perf_counter()
+                for s, t in queries:
+                    search.first_step(s, t)
+                    expanded += search.expanded
+                elapsed = time.perf_counter() - start
+                line += f" {expanded // len(queries):>9} {elapsed / len(queries) * 1e3:>8.3f}"
+            print(line)
+
+
+# full distance map from the centre, python bfs against the numpy wavefront
+def bench_wavefront():
+    if not wavefront.available:
+        print("wavefront: skipped, numpy is not installed")
+        return
+    print("wavefront: full distance map from the centre cell")
+    print(f"{'size':>10} {'maze':>8} {'depth':>7} {'python':>9} {'numpy':>9}")
+    rng = random.Random(1)
+    for n in (100, 250, 500, 1000):
+        for kind in ("perfect", "easy 75", "easy 25"):
+            walls = dfs_maze(n, n, rng)
+            if kind != "perfect":
+                easy_maze(walls, n, n, rng, int(kind.split()[1]))
+            target = (n // 2) * n + n // 2
+            (dist, _), t_python = timed(Searcher(walls, n, n).field, target)
+            maze = wavefront.WavefrontMaze(walls, n, n)
+            _, t_numpy = timed(maze.distances, target)
+            print(f"{n:>4}x{n:<5} {kind:>8} {max(dist):>7} {t_python:>9.3f} {t_numpy:>9.3f}")
+
+
+# many chasers after one player: one bfs per chaser against one batched search
+def bench_batch():
+    print("batch: first steps for many chasers, one bfs each against one batch")
+    print(f"{'size':>10} {'chasers':>8} {'per query':>10} {'batch':>9} {'same':>5}")
+    rng = random.Random(1)
+    for n in (50, 100, 250):
+        walls = easy_maze(dfs_maze(n, n, rng), n, n, rng)
+        search = Searcher(walls, n, n)
+        for chasers in (1, 10, 50):
+            target = rng.randrange(n * n)
+            queries = [(rng.randrange(n * n), target) for _ in range(chasers)]
+            single, t_single = timed(lambda: [search.first_step(s, t) for s, t in queries])
+            batch, t_batch = timed(search.first_steps, queries)
+            same = [-1 if s is None else s for s in single] == list(batch)
+            print(f"{n:>4}x{n:<5} {chasers:>8} {t_single:>10.4f} {t_batch:>9.4f} {str(same):>5}")
+
+
+# memory held by the packed maze store
+def bench_store():
+    print("store: memory of the packed maze store")
+    print(f"{'size':>10} {'cells':>9} {'memory':>10}")
+    for n in (15, 100, 1000, 2000):
+        tracemalloc.start()
+        store = MazeStore(n, n)
+        memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{n:>4}x{n:<5} {store.size:>9} {memory / 1024 ** 2:>7.2f} MB")
+
+
+# time and peak memory of every maze generator. the store itself is made before measuring.
+# "eller stream" only keeps one row, the way an endless maze would consume it
+def bench_generators():
+    print("generators: time and peak memory on top of the maze store")
+    print(f"{'size':>10} {'generator':>13} {'time':>9} {'peak':>10}")
+
+    def stream(rows, cols, rng):
+        for _ in eller_rows(rows, cols, rng):
+            pass
+
+    for n in (100, 250, 500):
+        for name, generate in list(GENERATORS.items()) + [("eller stream", None)]:
+            times = []
+            for measure in (False, True):
+                store = MazeStore(n, n)
+                rng = random.Random(n)
+                if measure:
+                    tracemalloc.start()
+                if generate is None:
+                    _, t = timed(stream, n, n, rng)
+                else:
+                    _, t = timed(generate, store.cells, n, n, rng)
+                times.append(t)
+                if measure:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+            print(f"{n:>4}x{n:<5} {name:>13} {times[0]:>9.3f} {peak / 1024:>7.0f} KB")
+
+
+# making a maze against loading it back from the disk cache
+def bench_cache():
+    print("cache: making a maze and make_easy against loading it from the cache")
+    print(f"{'size':>10} {'make':>9} {'load':>9} {'file':>10} {'same':>5}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = MazeCache(directory, 64 * 1024 * 1024)
+        for n in (15, 100, 250, 500, 1000):
+            store = MazeStore(n, n)
+            rng = random.Random(n)
+
+            def make():
+                GENERATORS["dfs"](store.cells, n, n, rng)
+                easy_maze(store.cells, n, n, rng)
+
+            _, t_make = timed(make)
+            made = bytes(store.cells)
+            cache.put(n, n, n, 75, "dfs", store.walls())
+            store.reset()
+
+            def load():
+                store.load_walls(cache.get(n, n, n, 75, "dfs"))
+
+            _, t_load = timed(load)
+            size = os.path.getsize(cache.path(n, n, n, 75, "dfs"))
+            same = bytes(store.cells) == made
+            print(f"{n:>4}x{n:<5} {t_make:>9.4f} {t_load:>9.4f} {size / 1024:>7.1f} KB {str(same):>5}")
+
+
+# the old make_easy() loop against the one pass over the whole maze
+def bench_easy():
+    print("easy: make_easy per cell against all at once")
+    print(f"{'size':>10} {'per cell':>9} {'at once':>9} {'opened':>7}")
+    for n in (15, 100, 250, 500, 1000):
+        maze = dfs_maze(n, n, random.Random(n))
+        _, t_legacy = timed(legacy_easy_maze, bytearray(maze), n, n, random.Random(1))
+        easy, t_easy = timed(easy_maze, bytearray(maze), n, n, random.Random(1))
+        opened = sum(1 for w in easy if w == 0) / max(1, (n - 2) ** 2)
+        print(f"{n:>4}x{n:<5} {t_legacy:>9.4f} {t_easy:>9.4f} {opened:>7.2f}")
+
+
+# memory of the endless maze while the player heads off in one direction
+def bench_endless():
+    print("endless: chunks kept and memory held while walking away, it should stay flat")
+    print(f"{'walked':>8} {'chunks':>7} {'made':>6} {'dropped':>8} {'memory':>10} {'per chunk':>10}")
+    maze = ChunkedMaze(1, size=32, max_chunks=25)
+    tracemalloc.start()
+    row = col = 0
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for walked in range(1, 20001):
+        col += 1
+        row += rng.choice((-1, 0, 1))
+        maze.ensure_around(row, col)
+        if walked % 4000 == 0:
+            per_chunk = (time.perf_counter() - start) / maze.generated
+            memory = tracemalloc.get_traced_memory()[0]
+            print(
+                f"{walked:>8} {len(maze.chunks):>7} {maze.generated:>6} {maze.evicted:>8}"
+                f" {memory / 1024:>7.0f} KB {per_chunk * 1000:>7.2f} ms"
+            )
+    tracemalloc.stop()
+
+
+# tiles built by worker processes against one dfs over the whole grid.
+# the speedup can't go past the number of cores
+def bench_tiled():
+    cores = os.cpu_count() or 1
+    print(f"tiled: 128x128 tiles over worker processes against one dfs, {cores} cores")
+    print(f"{'size':>10} {'workers':>8} {'time':>9} {'speedup':>8}")
+    for n in (500, 1000):
+        store = MazeStore(n, n)
+        _, t_dfs = timed(GENERATORS["dfs"], store.cells, n, n, random.Random(n))
+        print(f"{n:>4}x{n:<5} {'dfs':>8} {t_dfs:>9.3f} {1:>8.2f}")
+        for workers in sorted({1, 2, 4, cores}):
+            _, t = timed(generators.build_tiled, n, n, n, 128, "dfs", workers)
+            print(f"{n:>4}x{n:<5} {workers:>8} {t:>9.3f} {t_dfs / t:>8.2f}")
+
+
+# hierarchical search against bfs on easy mazes: time per random search and the path length
+# against the shortest one, for merged entrances and for all of them kept
+def bench_hpa():
+    print("hpa: 100 random searches, 16x16 clusters against bfs, path length over the shortest")
+    print(
+        f"{'size':>10} {'entrances':>10} {'nodes':>7} {'build':>7} {'bfs ms':>8} {'hpa ms':>8}"
+        f" {'mean':>6} {'worst':>6}"
+    )
+    rng = random.Random(1)
+    for n in (100, 250, 500, 1000):
+        walls = easy_maze(dfs_maze(n, n, rng), n, n, rng)
+        search = Searcher(walls, n, n)
+        queries = [(rng.randrange(n * n), rng.randrange(n * n)) for _ in range(100)]
+        shortest = {}
+        for s, t in queries:
+            if t not in shortest:
+                shortest[t] = search.field(t)[0]
+        _, t_bfs = timed(lambda: [search.first_step(s, t) for s, t in queries])
+        for merge in (True, False):
+            graph, t_build = timed(HPAGraph, walls, n, n, 16, merge)
+            _, t_hpa = timed(lambda: [graph.first_step(s, t) for s, t in queries])
+            ratios = [graph.search(s, t)[0] / shortest[t][s] for s, t in queries if s != t]
+            print(
+                f"{n:>4}x{n:<5} {'merged' if merge else 'all':>10} {graph.nodes:>7} {t_build:>7.2f}"
+                f" {t_bfs / len(queries) * 1e3:>8.3f} {t_hpa / len(queries) * 1e3:>8.3f}"
+                f" {sum(ratios) / len(ratios):>6.3f} {max(ratios):>6.3f}"
+            )
+
+
+# loading random mazes out of a corpus against making them
+def bench_corpus():
+    print("corpus: making a maze against loading a random one out of an mmapped corpus")
+    print(f"{'size':>10} {'mazes':>7} {'file':>10} {'write':>8} {'make ms':>8} {'load ms':>8}")
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        for n, count in ((15, 20000), (100, 1000), (250, 100)):
+            path = os.path.join(directory, f"{n}.corpus")
+            _, t_write = timed(write_corpus, path, n, n, count)
+            picks = [rng.randrange(count) for _ in range(100)]
+            _, t_make = timed(lambda: [generators.build(n, n, p, 75) for p in picks[:10]])
+            with MazeCorpus(path) as corpus:
+                store = MazeStore(n, n)
+
+                def load():
+                    for p in picks:
+                        store.reset()
+                        corpus.load(p, store)
+
+                _, t_load = timed(load)
+            print(
+                f"{n:>4}x{n:<5} {count:>7} {os.path.getsize(path) / 1024:>7.0f} KB {t_write:>8.1f}"
+                f" {t_make / 10 * 1e3:>8.3f} {t_load / len(picks) * 1e3:>8.3f}"
+            )
+
+
+BENCHMARKS = {
+    "bfs": bench_bfs,
+    "table": bench_table,
+    "junctions": bench_junctions,
+    "strategies": bench_strategies,
+    "wavefront": bench_wavefront,
+    "batch": bench_batch,
+    "store": bench_store,
+    "generators": bench_generators,
+    "cache": bench_cache,
+    "easy": bench_easy,
+    "endless": bench_endless,
+    "tiled": bench_tiled,
+    "hpa": bench_hpa,
+    "corpus": bench_corpus,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
+        print()
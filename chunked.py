@@ -0,0 +1,103 @@
+# ENDLESS MAZE MADE OF CHUNKS
+# the plane is cut into size x size chunks, each its own perfect maze made from a seed of its own.
+# the border between two chunks gets a few openings picked from a seed of that border, so both sides
+# agree without the other chunk being loaded, and every chunk being connected inside makes the whole
+# maze connected. only the chunks near the player are kept, the least recently used are dropped
+# and simply made again from their seed when needed, so memory stays flat however far it goes.
+# only walls are kept, anything eaten in a dropped chunk comes back with it.
+from collections import OrderedDict
+import random
+
+from generators import GENERATORS, WALLS, make_easy
+from pathfinding import ALL_WALLS, BOTTOM, LEFT, RIGHT, TOP
+
+
+class ChunkedMaze:
+    def __init__(
+        self, seed, size=32, max_chunks=64, openings=2, difficulty=75, generator="dfs"
+    ):
+        self.seed = seed
+        self.size = size
+        self.max_chunks = max_chunks
+        self.openings = min(openings, size)
+        self.difficulty = difficulty
+        self.generator = generator
+        self.chunks = OrderedDict()  # (chunk row, chunk col) -> wall codes, least recently used first
+        self.generated = 0
+        self.evicted = 0
+
+    # cells of the border on the right of (below) a chunk that are open to the next chunk
+    def _openings(self, kind, crow, ccol):
+        rng = random.Random(f"{self.seed}:{kind}:{crow}:{ccol}")
+        return rng.sample(range(self.size), self.openings)
+
+    def _generate(self, crow, ccol):
+        size = self.size
+        cells = bytearray([ALL_WALLS]) * (size * size)
+        rng = random.Random(f"{self.seed}:{crow}:{ccol}")
+        GENERATORS[self.generator](cells, size, size, rng)
+        make_easy(cells, size, size, rng, self.difficulty)
+        # open the borders, the same cells the neighbouring chunks open on their side
+        for r in self._openings("right", crow, ccol):
+            cells[r * size + size - 1] &= ~RIGHT
+        for r in self._openings("right", crow, ccol - 1):
+            cells[r * size] &= ~LEFT
+        for c in self._openings("down", crow, ccol):
+            cells[(size - 1) * size + c] &= ~BOTTOM
+        for c in self._openings("down", crow - 1, ccol):
+            cells[c] &= ~TOP
+        self.generated += 1
+        return bytes(cells).translate(WALLS)
+
+    # the wall codes of a chunk, made if it isn't loaded
+    def chunk(self, crow, ccol):
+        key = (crow, ccol)
+        walls = self.chunks.get(key)
+        if walls is None:
+            walls = self.chunks[key] = self._generate(crow, ccol)
+            while len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.chunks.move_to_end(key)
+        return walls
+
+    # wall code of the cell at (row, col), which can be anywhere, negative included
+    def walls(self, row, col):
+        crow, r = divmod(row, self.size)
+        ccol, c = divmod(col, self.size)
+        return self.chunk(crow, ccol)[r * self.size + c]
+
+    # load every chunk within radius chunks of a cell, before the player gets there
+    def ensure_around(self, row, col, radius=1):
+        crow, ccol = row // self.size, col // self.size
+        for dr in range(-radius, radius + 1):
+            for dc in range(-radius, radius + 1):
+                self.chunk(crow + dr, ccol + dc)
+
+    # wall codes of a rows x cols view with its top left cell at (top, left), one byte per cell,
+    # the layout MazeStore.load_walls takes. the edges are closed unless close_edges is False
+    def window(self, top, left, rows, cols, close_edges=True):
+        size = self.size
+        out = bytearray()
+        for row in range(top, top + rows):
+            crow, r = divmod(row, size)
+            col = left
+            while col < left + cols:
+                ccol, c = divmod(col, size)
+                take = min(size - c, left + cols - col)
+                start = r * size + c
+                out += self.chunk(crow, ccol)[start : start + take]
+                col += take
+        if close_edges:
+            for c in range(cols):
+                out[c] |= TOP
+                out[(rows - 1) * cols + c] |= BOTTOM
+            for r in range(rows):
+                out[r * cols] |= LEFT
+                out[r * cols + cols - 1] |= RIGHT
+        return bytes(out)
+
+    @property
+    def nbytes(self):
+        return len(self.chunks) * self.size * self.size
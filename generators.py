@@ -0,0 +1,399 @@
+# MAZE GENERATORS OVER A PACKED MAZE (see maze_store.py)
+# every generator carves a perfect maze into cells in place, marking the cells it joins as VISITED.
+# blank cells are left out. rng is anything with the random module's methods, the module itself included.
+# the *_steps versions in STEPPERS do the same work but yield the cells they changed after every step,
+# so the caller can stop and carry on later, and only redraw what changed.
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import random
+from array import array
+
+from maze_store import BLANK, VISITED, MazeStore, den_cells, merge_walls, remove_wall
+from pathfinding import ALL_WALLS, BOTTOM, LEFT, RIGHT, TOP
+
+
+# THE UNVISITED, NON BLANK NEIGHBOURS OF A CELL. WALLS IN BETWEEN ARE NOT CONSIDERED
+def unvisited_neighbours(cells, rows, cols, current):
+    row, col = divmod(current, cols)
+    neighbours = []
+    if 0 < row and not cells[current - cols] & (VISITED | BLANK):
+        neighbours.append(current - cols)  # top
+    if rows - 1 > row and not cells[current + cols] & (VISITED | BLANK):
+        neighbours.append(current + cols)  # bottom
+    if 0 < col and not cells[current - 1] & (VISITED | BLANK):
+        neighbours.append(current - 1)  # left
+    if cols - 1 > col and not cells[current + 1] & (VISITED | BLANK):
+        neighbours.append(current + 1)  # right
+    return neighbours
+
+
+# run a *_steps generator to the end
+def drain(steps):
+    deque(steps, maxlen=0)
+
+
+# the root of i's set in a union-find kept as a parent array, halving the path on the way
+def find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+# the multiprocessing context for worker pools. fork where there is one,
+# a spawned worker would import the game's main module again
+def pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+# randomised dfs with backtracking, the original maze_algorithm(). long corridors, O(cells) stack
+def dfs_steps(cells, rows, cols, rng, start=0):
+    current = start
+    cells[current] |= VISITED
+    yield (current,)
+    stack = []
+    while True:
+        neighbours = unvisited_neighbours(cells, rows, cols, current)
+        if neighbours:
+            next = neighbours[rng.randint(0, len(neighbours) - 1)]
+            stack.append(current)
+            remove_wall(cells, cols, current, next)
+            cells[next] |= VISITED
+            yield current, next
+            current = next
+        elif stack:
+            current = stack.pop()
+            yield (current,)
+        if not stack:
+            return
+
+
+def dfs(cells, rows, cols, rng, start=0):
+    drain(dfs_steps(cells, rows, cols, rng, start))
+
+
+# randomised kruskal. every wall between two cells is knocked down in random order,
+# unless the cells are already joined, which a union-find keeps track of
+def kruskal_steps(cells, rows, cols, rng):
+    size = rows * cols
+    parent = array("i", range(size))
+
+    # edge e joins cell e // 2 to the cell right of it (even e) or below it (odd e)
+    edges = array("i")
+    for i in range(size):
+        if cells[i] & BLANK:
+            continue
+        row, col = divmod(i, cols)
+        if col < cols - 1 and not cells[i + 1] & BLANK:
+            edges.append(2 * i)
+        if row < rows - 1 and not cells[i + cols] & BLANK:
+            edges.append(2 * i + 1)
+    rng.shuffle(edges)
+
+    for e in edges:
+        a = e >> 1
+        b = a + (cols if e & 1 else 1)
+        ra, rb = find(parent, a), find(parent, b)
+        if ra != rb:
+            parent[ra] = rb
+            remove_wall(cells, cols, a, b)
+            cells[a] |= VISITED
+            cells[b] |= VISITED
+            yield a, b
+
+    # cells walled in by blanks are never joined, but are still part of the maze
+    lone = [i for i in range(size) if not cells[i] & (VISITED | BLANK)]
+    for i in lone:
+        cells[i] |= VISITED
+    if lone:
+        yield lone
+
+
+def kruskal(cells, rows, cols, rng):
+    drain(kruskal_steps(cells, rows, cols, rng))
+
+
+# THE NON BLANK NEIGHBOURS OF A CELL, VISITED OR NOT. WALLS IN BETWEEN ARE NOT CONSIDERED
+def free_neighbours(cells, rows, cols, current):
+    row, col = divmod(current, cols)
+    neighbours = []
+    if row > 0 and not cells[current - cols] & BLANK:
+        neighbours.append(current - cols)
+    if row < rows - 1 and not cells[current + cols] & BLANK:
+        neighbours.append(current + cols)
+    if col > 0 and not cells[current - 1] & BLANK:
+        neighbours.append(current - 1)
+    if col < cols - 1 and not cells[current + 1] & BLANK:
+        neighbours.append(current + 1)
+    return neighbours
+
+
+# the non blank cells split into the parts blanks cut them into, every part in index order.
+# a walk can't leave its part, so every part is made on its own
+def free_parts(cells, rows, cols):
+    size = rows * cols
+    part = bytearray(size)  # 1 once a cell is in a part
+    parts = []
+    for i in range(size):
+        if part[i] or cells[i] & BLANK:
+            continue
+        part[i] = 1
+        members = array("i", (i,))
+        for current in members:  # grows while it's read, a bfs
+            for n in free_neighbours(cells, rows, cols, current):
+                if not part[n]:
+                    part[n] = 1
+                    members.append(n)
+        parts.append(array("i", sorted(members)))
+    return parts
+
+
+# wilson's loop erased random walks. every cell walks at random until it hits the maze,
+# then the walk without its loops is added. unbiased, every perfect maze is equally likely.
+# when blanks cut the free cells apart, every part gets a maze of its own, like kruskal's
+def wilson_steps(cells, rows, cols, rng):
+    size = rows * cols
+    heading = array("i", [-1]) * size  # the last step taken out of every cell of the walk
+
+    for free in free_parts(cells, rows, cols):
+        first = free[rng.randrange(len(free))]
+        cells[first] |= VISITED
+        yield (first,)
+
+        for start in free:
+            if cells[start] & VISITED:
+                continue
+            # walk, remembering only the last way out of every cell, which erases the loops
+            current = start
+            while not cells[current] & VISITED:
+                neighbours = free_neighbours(cells, rows, cols, current)
+                heading[current] = neighbours[rng.randrange(len(neighbours))]
+                current = heading[current]
+
+            # carve the loop erased walk into the maze
+            current = start
+            while not cells[current] & VISITED:
+                cells[current] |= VISITED
+                remove_wall(cells, cols, current, heading[current])
+                yield current, heading[current]
+                current = heading[current]
+
+
+def wilson(cells, rows, cols, rng):
+    drain(wilson_steps(cells, rows, cols, rng))
+
+
+# eller's algorithm, one row at a time with O(cols) memory.
+# yields the wall bits of every row, rows=None streams rows forever.
+# it only sees one row, so blank cells are not supported
+def eller_rows(rows, cols, rng):
+    sets = [-1] * cols  # set of every cell of the current row, -1 for none yet
+    members = {}  # set -> columns of the current row in it
+    next_set = 0
+    open_top = [False] * cols
+    row = 0
+    while rows is None or row < rows:
+        last = rows is not None and row == rows - 1
+        walls = bytearray([ALL_WALLS]) * cols
+        for col in range(cols):
+            if open_top[col]:
+                walls[col] &= ~TOP
+            if sets[col] == -1:
+                sets[col] = next_set
+                members[next_set] = [col]
+                next_set += 1
+
+        # join neighbours in different sets at random, all of them on the last row
+        for col in range(cols - 1):
+            a, b = sets[col], sets[col + 1]
+            if a != b and (last or rng.random() < 0.5):
+                walls[col] &= ~RIGHT
+                walls[col + 1] &= ~LEFT
+                if len(members[a]) < len(members[b]):
+                    a, b = b, a
+                for c in members[b]:
+                    sets[c] = a
+                members[a].extend(members.pop(b))
+
+        # every set goes down at least once, so nothing gets cut off
+        open_top = [False] * cols
+        if not last:
+            for cols_in_set in members.values():
+                down = rng.choice(cols_in_set)
+                for c in cols_in_set:
+                    if c == down or rng.random() < 0.5:
+                        walls[c] &= ~BOTTOM
+                        open_top[c] = True
+
+            next_sets = [-1] * cols
+            next_members = {}
+            for c in range(cols):
+                if open_top[c]:
+                    next_sets[c] = sets[c]
+                    next_members.setdefault(sets[c], []).append(c)
+            sets, members = next_sets, next_members
+
+        yield bytes(walls)
+        row += 1
+
+
+def eller_steps(cells, rows, cols, rng):
+    for row, walls in enumerate(eller_rows(rows, cols, rng)):
+        base = row * cols
+        for col in range(cols):
+            cells[base + col] = (cells[base + col] & ~ALL_WALLS) | walls[col] | VISITED
+        yield range(base, base + cols)
+
+
+def eller(cells, rows, cols, rng):
+    drain(eller_steps(cells, rows, cols, rng))
+
+
+NOT_BLANK = bytes(0 if b & BLANK else 255 for b in range(256))
+WALLS = bytes(b & ALL_WALLS for b in range(256))
+# OPENED[draws][b]: 0xFF if any of the first draws two bit numbers in the random byte b is 0
+OPENED = [
+    bytes(255 if any((b >> 2 * d) & 3 == 0 for d in range(draws)) else 0 for b in range(256))
+    for draws in range(5)
+]
+
+
+# knock all the walls off some of the interior cells, except the ones to blank cells.
+# every cell draws int(4 * (100 - difficulty) / 100) numbers from 0 to 3 and is opened if any is 0.
+# all the draws come from one getrandbits call and are applied to whole rows of cells at once,
+# by treating the maze as a big integer with a byte per cell
+def make_easy(cells, rows, cols, rng, difficulty=75):
+    draws = int(4 * (100 - difficulty) / 100)
+    if draws <= 0 or rows < 3 or cols < 3:
+        return
+    size = rows * cols
+    full = (1 << 8 * size) - 1
+
+    def lanes(data):
+        return int.from_bytes(data, "little")
+
+    def repeat(byte):
+        return lanes(bytes([byte]) * size)
+
+    noise = rng.getrandbits(8 * size).to_bytes(size, "little")
+    interior = bytes(cols) + (b"\0" + b"\xff" * (cols - 2) + b"\0") * (rows - 2) + bytes(cols)
+    present = lanes(bytes(cells).translate(NOT_BLANK))
+    opened = lanes(noise.translate(OPENED[draws])) & lanes(interior) & present
+
+    # the wall between a cell and the one right of (below) it goes if both are there and either opened
+    right = present & (present >> 8) & (opened | (opened >> 8))
+    down = present & (present >> 8 * cols) & (opened | (opened >> 8 * cols))
+    gone = (
+        (right & repeat(RIGHT))
+        | ((right << 8) & repeat(LEFT))
+        | (down & repeat(BOTTOM))
+        | ((down << 8 * cols) & repeat(TOP))
+    )
+    cells[:] = (lanes(cells) & ~gone & full).to_bytes(size, "little")
+
+
+# one tile of a tiled maze, run in a worker process
+def _build_tile(job):
+    rows, cols, seed, generator = job
+    cells = bytearray([ALL_WALLS]) * (rows * cols)
+    GENERATORS[generator](cells, rows, cols, random.Random(seed))
+    return bytes(cells).translate(WALLS)
+
+
+# a perfect maze made of tile x tile pieces built in parallel by worker processes.
+# every tile is a perfect maze of its own, then the tiles are joined along a random spanning tree
+# of the tile grid with one opening per tree edge, so the whole is still perfect.
+# workers=1 builds the tiles in this process. the same seed gives the same maze with any workers.
+# returns the wall codes, one byte per cell
+def build_tiled(rows, cols, seed, tile=128, generator="dfs", workers=None):
+    trows, tcols = -(-rows // tile), -(-cols // tile)
+    jobs = [
+        (min(tile, rows - tr * tile), min(tile, cols - tc * tile), f"{seed}:{tr}:{tc}", generator)
+        for tr in range(trows)
+        for tc in range(tcols)
+    ]
+    if workers == 1 or len(jobs) == 1:
+        pieces = list(map(_build_tile, jobs))
+    else:
+        with ProcessPoolExecutor(workers, mp_context=pool_context()) as pool:
+            pieces = list(pool.map(_build_tile, jobs, chunksize=max(1, len(jobs) // 32)))
+
+    walls = bytearray(rows * cols)
+    for t, ((th, tw, _, _), piece) in enumerate(zip(jobs, pieces)):
+        top, left = t // tcols * tile, t % tcols * tile
+        for r in range(th):
+            start = (top + r) * cols + left
+            walls[start : start + tw] = piece[r * tw : (r + 1) * tw]
+
+    # a random spanning tree of the tiles, kruskal over the borders between them
+    rng = random.Random(f"{seed}:joins")
+    parent = list(range(trows * tcols))
+    borders = [(t, t + 1) for t in range(trows * tcols) if t % tcols < tcols - 1]
+    borders += [(t, t + tcols) for t in range(trows * tcols - tcols)]
+    rng.shuffle(borders)
+    for a, b in borders:
+        ra, rb = find(parent, a), find(parent, b)
+        if ra == rb:
+            continue
+        parent[ra] = rb
+        tr, tc = divmod(a, tcols)
+        if b == a + tcols:
+            # a random column of the border below tile a
+            c = tc * tile + rng.randrange(min(tile, cols - tc * tile))
+            cell = (tr * tile + tile - 1) * cols + c
+            remove_wall(walls, cols, cell, cell + cols)
+        else:
+            r = tr * tile + rng.randrange(min(tile, rows - tr * tile))
+            cell = r * cols + tc * tile + tile - 1
+            remove_wall(walls, cols, cell, cell + 1)
+    return walls
+
+
+# build_tiled into a packed maze. blank cells are not supported.
+# the tiles are built in this process: the game would fork its window and threads into the workers,
+# and the corpus workers are worker processes already. call build_tiled itself for the process pool
+def tiled(cells, rows, cols, rng):
+    merge_walls(cells, build_tiled(rows, cols, rng.getrandbits(64), workers=1))
+
+
+# the tiles are built all at once, so it's one step
+def tiled_steps(cells, rows, cols, rng):
+    tiled(cells, rows, cols, rng)
+    yield range(rows * cols)
+
+
+GENERATORS = {
+    "dfs": dfs,
+    "kruskal": kruskal,
+    "wilson": wilson,
+    "eller": eller,
+    "tiled": tiled,
+}
+
+STEPPERS = {
+    "dfs": dfs_steps,
+    "kruskal": kruskal_steps,
+    "wilson": wilson_steps,
+    "eller": eller_steps,
+    "tiled": tiled_steps,
+}
+
+# the generators that carve through blank cells, so they can't leave a den out
+NO_BLANKS = {"eller", "tiled"}
+
+
+# the walls of a whole level made from its seed, the same as maze_algorithm() and make_easy() make them.
+# den leaves the den in the middle out, like make_den()
+def build(rows, cols, seed, difficulty, generator="dfs", den=False):
+    if den and generator in NO_BLANKS:
+        raise ValueError(f"the {generator} generator can't leave a den out")
+    store = MazeStore(rows, cols)
+    if den:
+        for i in den_cells(rows, cols):
+            store.cells[i] |= BLANK
+    rng = random.Random(seed)
+    GENERATORS[generator](store.cells, rows, cols, rng)
+    make_easy(store.cells, rows, cols, rng, difficulty)
+    return store.walls()
@@ -0,0 +1,166 @@
+# HIERARCHICAL PATHFINDING (HPA*) FOR VERY LARGE MAZES
+# the maze is cut into cluster x cluster squares. every open wall between two clusters is an entrance,
+# its two cells become nodes of a small abstract graph, joined by the entrance itself and by the
+# distances between the nodes of a cluster, found once with bfs kept inside the cluster.
+# a search only looks at cells in the clusters of the chaser and the player, the rest is an A* over
+# the abstract graph, and only the first bit of the path near the chaser is turned back into cells.
+# the entrances between the same two pieces of neighbouring clusters (cells joined inside a cluster)
+# are merged into one, which keeps everything reachable but can make paths a little longer.
+# with merge=False every entrance is kept and paths are as short as a bfs finds.
+from array import array
+from collections import deque
+import heapq
+
+from pathfinding import open_neighbours
+
+
+class HPAGraph:
+    def __init__(self, walls, rows, cols, cluster=16, merge=True):
+        self.walls = walls
+        self.rows = rows
+        self.cols = cols
+        self.cluster = cluster
+        self.node_of = {}  # cell -> node number, for the cells next to an entrance
+        self.node_cell = []  # cell of every node
+        self.adj = []  # (node, distance) of every node's neighbours in the abstract graph
+        self.cluster_nodes = {}  # cluster -> nodes in it
+        self.expanded = 0  # nodes popped by the last search
+        self._target = None  # (target, local bfs) of the last search, the player rarely moves
+        size = rows * cols
+
+        # open walls between clusters, by the pieces of the two clusters they join
+        entrances = {}
+        if merge:
+            piece = array("i", [-1]) * size  # cells joined inside their cluster share a piece
+            pieces = 0
+            for i in range(size):
+                if piece[i] == -1:
+                    for cell in self._local(i)[0]:
+                        piece[cell] = pieces
+                    pieces += 1
+        for i in range(size):
+            for n in open_neighbours(walls, cols, i):
+                # every entrance once, from the cell on its left or top
+                if n > i and self._cluster(n) != self._cluster(i):
+                    key = (piece[i], piece[n]) if merge else (i, n)
+                    entrances.setdefault(key, []).append((i, n))
+
+        # when merging, one entrance is enough between the same two pieces, the middle one
+        for crossings in entrances.values():
+            i, n = crossings[len(crossings) // 2]
+            a, b = self._node(i), self._node(n)
+            self.adj[a].append((b, 1))
+            self.adj[b].append((a, 1))
+
+        for nodes in self.cluster_nodes.values():
+            for a in nodes:
+                dist, _ = self._local(self.node_cell[a])
+                for b in nodes:
+                    if b != a and self.node_cell[b] in dist:
+                        self.adj[a].append((b, dist[self.node_cell[b]]))
+
+    def _cluster(self, cell):
+        r, c = divmod(cell, self.cols)
+        return r // self.cluster, c // self.cluster
+
+    def _node(self, cell):
+        node = self.node_of.get(cell)
+        if node is None:
+            node = self.node_of[cell] = len(self.node_cell)
+            self.node_cell.append(cell)
+            self.adj.append([])
+            self.cluster_nodes.setdefault(self._cluster(cell), []).append(node)
+        return node
+
+    @property
+    def nodes(self):
+        return len(self.node_cell)
+
+    # bfs from a cell that doesn't leave its cluster: (distance, parent) of every cell it reaches
+    def _local(self, source):
+        cols, size = self.cols, self.cluster
+        r, c = divmod(source, cols)
+        top, left = r - r % size, c - c % size
+        bottom, right = top + size, left + size
+        dist = {source: 0}
+        parent = {}
+        queue = deque([source])
+        while queue:
+            cur = queue.popleft()
+            d = dist[cur] + 1
+            for n in open_neighbours(self.walls, cols, cur):
+                if n in dist:
+                    continue
+                nr, nc = divmod(n, cols)
+                if top <= nr < bottom and left <= nc < right:
+                    dist[n] = d
+                    parent[n] = cur
+                    queue.append(n)
+        return dist, parent
+
+    # A* over the abstract graph. returns (distance, first cell stepped to), None if target
+    # can't be reached
+    def search(self, source, target):
+        self.expanded = 0
+        if source == target:
+            return 0, source
+        cols = self.cols
+        tr, tc = divmod(target, cols)
+
+        def h(cell):
+            r, c = divmod(cell, cols)
+            return abs(r - tr) + abs(c - tc)
+
+        source_dist, source_parent = self._local(source)
+        if self._target is None or self._target[0] != target:
+            self._target = (target, self._local(target)[0])
+        target_dist = self._target[1]
+
+        GOAL = -1
+        goal_entries = {
+            node: target_dist[self.node_cell[node]]
+            for node in self.cluster_nodes.get(self._cluster(target), ())
+            if self.node_cell[node] in target_dist
+        }
+        # heap of (estimate, distance, node, first cell of the path that isn't the source)
+        heap = []
+        if target in source_dist:
+            heapq.heappush(heap, (source_dist[target], source_dist[target], GOAL, target))
+        for node in self.cluster_nodes.get(self._cluster(source), ()):
+            cell = self.node_cell[node]
+            if cell in source_dist:
+                d = source_dist[cell]
+                heapq.heappush(heap, (d + h(cell), d, node, cell if cell != source else None))
+
+        settled = set()
+        while heap:
+            _, d, node, way = heapq.heappop(heap)
+            if node == GOAL:
+                return d, self._first_step(source, way, source_parent)
+            if node in settled:
+                continue
+            settled.add(node)
+            self.expanded += 1
+
+            if node in goal_entries:
+                d_goal = d + goal_entries[node]
+                heapq.heappush(heap, (d_goal, d_goal, GOAL, target if way is None else way))
+            for n, w in self.adj[node]:
+                if n not in settled:
+                    cell = self.node_cell[n]
+                    heapq.heappush(heap, (d + w + h(cell), d + w, n, cell if way is None else way))
+        return None
+
+    # the cell next to source on the way to the first cell of the path, which is either in its
+    # cluster or just across an entrance from it
+    def _first_step(self, source, way, parent):
+        if way not in parent:
+            return way
+        while parent[way] != source:
+            way = parent[way]
+        return way
+
+    # the cell to step to from source to get closer to target, None if it can't be reached
+    def first_step(self, source, target):
+        found = self.search(source, target)
+        return None if found is None else found[1]
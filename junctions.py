@@ -0,0 +1,161 @@
+# JUNCTION GRAPH OF A MAZE
+# most cells of a dfs maze are corridor cells with exactly two openings. they are contracted away,
+# leaving a weighted graph of junctions and dead ends with the corridor lengths as edge weights.
+# searches run over that graph and only go back to cells for the first step.
+import heapq
+
+from pathfinding import BOTTOM, LEFT, RIGHT, TOP, open_neighbours
+
+
+def degree(w):
+    return 4 - ((w & RIGHT) > 0) - ((w & LEFT) > 0) - ((w & BOTTOM) > 0) - ((w & TOP) > 0)
+
+
+class JunctionGraph:
+    def __init__(self, walls, rows, cols):
+        self.walls = walls
+        self.rows = rows
+        self.cols = cols
+        size = rows * cols
+
+        self.node_of = [-1] * size  # node number of every junction / dead end cell
+        self.node_cell = []  # cell of every node
+        self.edge_of = [-1] * size  # edge every corridor cell lies on
+        self.pos_of = [-1] * size  # position of a corridor cell along its edge
+        # every edge is (a, b, weight, cells), cells being the corridor between node a and node b in order
+        self.edges = []
+        self.adj = []  # edges touching every node
+        self.expanded = 0  # nodes popped by the last search
+
+        for i in range(size):
+            if degree(walls[i]) != 2:
+                self._add_node(i)
+        for node in range(len(self.node_cell)):
+            self._walk_edges(node)
+
+        # loops made only of corridor cells have no junction on them, so promote one cell
+        for i in range(size):
+            if self.node_of[i] == -1 and self.edge_of[i] == -1:
+                self._walk_edges(self._add_node(i))
+
+    def _add_node(self, cell):
+        self.node_of[cell] = len(self.node_cell)
+        self.node_cell.append(cell)
+        self.adj.append([])
+        return self.node_of[cell]
+
+    # follow every corridor leaving the node until it reaches another node
+    def _walk_edges(self, a):
+        start = self.node_cell[a]
+        for first in open_neighbours(self.walls, self.cols, start):
+            if self.node_of[first] != -1:
+                b = self.node_of[first]
+                # two neighbouring nodes, add the edge once
+                if a < b:
+                    self._add_edge(a, b, [])
+                continue
+            if self.edge_of[first] != -1:
+                continue  # already walked from the other end
+
+            cells = []
+            prev, cur = start, first
+            while self.node_of[cur] == -1:
+                cells.append(cur)
+                for n in open_neighbours(self.walls, self.cols, cur):
+                    if n != prev:
+                        prev, cur = cur, n
+                        break
+            self._add_edge(a, self.node_of[cur], cells)
+
+    def _add_edge(self, a, b, cells):
+        e = len(self.edges)
+        self.edges.append((a, b, len(cells) + 1, cells))
+        for pos, cell in enumerate(cells):
+            self.edge_of[cell] = e
+            self.pos_of[cell] = pos
+        self.adj[a].append(e)
+        if b != a:
+            self.adj[b].append(e)
+
+    @property
+    def nodes(self):
+        return len(self.node_cell)
+
+    # the ways out of a cell: (node, distance, first cell stepped to)
+    def _exits(self, cell):
+        node = self.node_of[cell]
+        if node != -1:
+            for e in self.adj[node]:
+                a, b, weight, cells = self.edges[e]
+                if a == node:
+                    yield b, weight, cells[0] if cells else self.node_cell[b]
+                if b == node:
+                    yield a, weight, cells[-1] if cells else self.node_cell[a]
+            return
+
+        a, b, weight, cells = self.edges[self.edge_of[cell]]
+        pos = self.pos_of[cell]
+        yield a, pos + 1, cells[pos - 1] if pos > 0 else self.node_cell[a]
+        yield b, weight - pos - 1, cells[pos + 1] if pos < len(cells) - 1 else self.node_cell[b]
+
+    # dijkstra over the junction graph. returns (distance, first cell stepped to),
+    # None if target can't be reached
+    def search(self, source, target):
+        if source == target:
+            self.expanded = 0
+            return 0, source
+
+        GOAL = -1  # the target, when it sits in the middle of a corridor
+        goal_node = self.node_of[target]
+        goal_entries = {}  # node -> distance from that node to the target along its corridor
+        heap = []
+        if goal_node == -1:
+            a, b, weight, cells = self.edges[self.edge_of[target]]
+            pos = self.pos_of[target]
+            goal_entries[a] = pos + 1
+            goal_entries[b] = min(goal_entries.get(b, weight), weight - pos - 1)
+            # source on the same corridor as the target, or at one of its ends
+            if self.node_of[source] == -1 and self.edge_of[source] == self.edge_of[target]:
+                spos = self.pos_of[source]
+                step = cells[spos + 1] if pos > spos else cells[spos - 1]
+                heapq.heappush(heap, (abs(pos - spos), GOAL, step))
+            if self.node_of[source] == a:
+                heapq.heappush(heap, (pos + 1, GOAL, cells[0]))
+            if self.node_of[source] == b:
+                heapq.heappush(heap, (weight - pos - 1, GOAL, cells[-1]))
+        else:
+            GOAL = goal_node
+
+        for node, d, step in self._exits(source):
+            heapq.heappush(heap, (d, node, step))
+
+        settled = set()
+        if self.node_of[source] != -1:
+            settled.add(self.node_of[source])
+        expanded = 0
+        while heap:
+            d, node, step = heapq.heappop(heap)
+            if node == GOAL:
+                self.expanded = expanded
+                return d, step
+            if node in settled:
+                continue
+            settled.add(node)
+            expanded += 1
+
+            if node in goal_entries:
+                heapq.heappush(heap, (d + goal_entries[node], GOAL, step))
+            for e in self.adj[node]:
+                a, b, weight, _ = self.edges[e]
+                if a == node and b not in settled:
+                    heapq.heappush(heap, (d + weight, b, step))
+                if b == node and a not in settled:
+                    heapq.heappush(heap, (d + weight, a, step))
+
+        self.expanded = expanded
+        return None
+
+    # the cell to step to from source to get closer to target, None if it can't be reached
+    def first_step(self, source, target):
+        found = self.search(source, target)
+        return None if found is None else found[1]
@@ -1,16 +1,36 @@
 # MAZE CREATOR USING RANDOMISED DFS AND BACKTRACKING
 # PATH GENERATION USING DFS AND BFS (ANY ONE)
 import asyncio
+from collections import OrderedDict
 import pygame  # USE PYGAME TO CREATE THE  GUI
 
 import random  # FOR RANDOMISING THE MAZE
 import time  # FOR KEEPING TRACK OF HOW MUCH TIME IT TAKES TO GENERATE THE MAZE
-from queue import (
-    LifoQueue as lifo,
-    Queue as fifo,
-)  # LIFO- USED FOR BACKTRACKING & DFS, AND FIFO- USED FOR BFS
-
-from threading import Thread
+from concurrent.futures import Executor, Future
+from queue import SimpleQueue
+from threading import Lock, Thread
+
+from assets import Assets
+from chunked import ChunkedMaze
+import generators
+from generators import STEPPERS
+from hierarchical import HPAGraph
+from junctions import JunctionGraph
+from maze_cache import MazeCache
+from maze_corpus import MazeCorpus
+import wavefront
+from nexthop import NextHopTable
+from maze_store import BLANK, POINT, VISITED, Grid, MazeStore, den_cells, flag_property
+from pathfinding import (
+    BOTTOM,
+    LEFT,
+    RIGHT,
+    STRATEGIES,
+    TOP,
+    CachedPath,
+    Searcher,
+    step_towards,
+)
 
 
 pygame.init()
@@ -20,6 +40,32 @@ infoObject = pygame.display.Info()
 
 pygame.font.init()
 
+FONTS = {}  # (face, size) -> font, each loaded once
+TEXT_CACHE = OrderedDict()  # (font, text, color) -> rendered text, least recently used first
+MAX_CACHED_TEXTS = 64
+
+
+# the font of a face and size, loaded the first time it's asked for
+def get_font(face, size):
+    font = FONTS.get((face, size))
+    if font is None:
+        font = FONTS[(face, size)] = pygame.font.Font(face, size)
+    return font
+
+
+# text rendered in a font, kept for the next time the same text is drawn
+def render_text(font, text, color):
+    key = (font, text, color)
+    surface = TEXT_CACHE.get(key)
+    if surface is None:
+        surface = TEXT_CACHE[key] = font.render(text, True, color)
+        while len(TEXT_CACHE) > MAX_CACHED_TEXTS:
+            TEXT_CACHE.popitem(last=False)
+    else:
+        TEXT_CACHE.move_to_end(key)
+    return surface
+
+
 # mouse related vars
 minSwipe = 50
 
@@ -44,6 +90,48 @@ wallwidth = min(WIDTH // 10, 8)  # WIDTH OF EVERY WALL
 pointRadius = min(WIDTH // 10, 8)
 
 animate_generation = False
+animation_speed = 5  # steps of the maze making shown per frame when animating
+# seconds of maze making per frame, then the event loop gets a turn
+generation_budget = 0.01
+# how the maze is carved, a name in GENERATORS: "dfs", "kruskal", "wilson", "eller" or "tiled"
+maze_generator = "dfs"
+# every level is made from one seed, covering the maze, make_easy and where the chasers start.
+# None picks a new seed every level, an int replays the same levels (level n uses maze_seed + n - 1)
+maze_seed = None
+easy_difficulty = 75  # passed to make_easy
+# finished mazes are kept in cache_dir, the least recently used go once it's over MAX_CACHE_BYTES.
+# None turns the cache off. it's only on with a fixed maze_seed, random seeds would never hit it
+cache_dir = ".maze_cache" if maze_seed is not None else None
+MAX_CACHE_BYTES = 8 * 1024 * 1024
+# make the next level's maze, and another one for a retry, in the background while a level is played
+pregenerate = True
+# take the mazes from a corpus file written by maze_corpus.py instead of making them,
+# a level gets maze number seed % the size of the corpus. None to make them
+corpus_path = None
+# build an all pairs next hop table in the background once the maze is done,
+# skipped when it would need more than MAX_TABLE_BYTES (one byte per pair of cells).
+# the build shares the interpreter with the game, frames take ~44ms instead of 33ms while it runs.
+# measured build times: 15x15 (49 KB) 48ms, 15x21 (97 KB) 92ms, 20x20 (156 KB) 110ms,
+# 25x25 (381 KB) 0.29s, 30x30 (791 KB) 0.67s, 40x40 (2.4 MB) 2.0s.
+# the default only covers grids up to the default 15x21, raise it to opt bigger grids in
+precompute_next_hops = True
+MAX_TABLE_BYTES = 128 * 1024
+# how the chasers find the player:
+# "field" - one shared search per player move, "cached" - every chaser repairs its own path,
+# or the name of a search in SEARCH_STRATEGIES that every chaser runs on its own
+chaser_pathing = "field"
+# strategies handed out to the chasers in turn by restart(). empty to use chaser_pathing for all
+chaser_strategies = []
+# how the shared distance field is computed: "python" bfs, or "numpy" wavefront for huge grids.
+# falls back to "python" when numpy isn't installed
+field_backend = "python"
+# endless mode: the grid is a rows x cols window onto a maze that never ends, made of chunks
+# (see chunked.py). once the player gets within endless_margin cells of an edge the window moves
+# to put the player back in the middle. there is no den, and no winning, only the score
+endless = False
+endless_margin = 3
+# put only the parts of the window drawn on during a frame on the screen. False flips all of it
+dirty_rect_updates = True
 FPS = 30
 
 # COLORS
@@ -62,29 +150,23 @@ GREY = (128, 128, 128)
 TURQUOISE = (64, 224, 208)
 BROWN = (150, 94, 0)
 
-# IMAGES
-playerR = pygame.transform.scale(
-    pygame.image.load("static/pacman.png"), (WIDTH // 2, WIDTH // 2)
-)
-playerU = pygame.transform.rotate(playerR, 90)
-playerL = pygame.transform.flip(playerR, True, False)
-playerD = pygame.transform.rotate(playerL, 90)
+# THE WINDOW COMES FIRST, THE IMAGES ARE CONVERTED TO ITS PIXEL FORMAT
+WIN = pygame.display.set_mode((LENGTH, BREADTH))
 
-chaserImg = pygame.transform.scale(
-    pygame.image.load("static/chaser.png"), (WIDTH // 2, WIDTH // 2)
-)
+# IMAGES, LOADED ONCE ONTO ONE ATLAS, SEE assets.py
+ASSETS = Assets(WIDTH // 2, min(WIDTH, 50))
+playerR = ASSETS["playerR"]
+playerU = ASSETS["playerU"]
+playerL = ASSETS["playerL"]
+playerD = ASSETS["playerD"]
 
-scoreFont = pygame.font.Font("freesansbold.ttf", 25)
+chaserImg = ASSETS["chaser"]
 
-pause_img = pygame.transform.scale(
-    pygame.image.load("static/pause.png"), (min(WIDTH, 50), min(WIDTH, 50))
-)
-play_img = pygame.transform.scale(
-    pygame.image.load("static/play.png"), (min(WIDTH, 50), min(WIDTH, 50))
-)
-restart_img = pygame.transform.scale(
-    pygame.image.load("static/restart.png"), (min(WIDTH, 50), min(WIDTH, 50))
-)
+scoreFont = get_font("freesansbold.ttf", 25)
+
+pause_img = ASSETS["pause"]
+play_img = ASSETS["play"]
+restart_img = ASSETS["restart"]
 
 
 button_style = {
@@ -103,217 +185,193 @@ restart_button_style = button_style.copy()
 restart_button_style["image"] = restart_img
 
 
-# A FUNCTION TO CHECK IF THE USER WANTS TO QUIT PYGAME.
-def CheckQuit():
-    for event in pygame.event.get():
+# THE ONLY PLACE EVENTS ARE TAKEN OFF THE QUEUE. IT RUNS ON THE MAIN THREAD, WHICH OWNS THE DISPLAY,
+# AND HANDLES QUITTING FOR EVERY LOOP. THE OTHER EVENTS ARE RETURNED TO THE CALLER.
+def get_events(logic=None):
+    events = pygame.event.get()
+    for event in events:
         if event.type == pygame.QUIT:
             print("Quit via user interruption")
+            if logic is not None:
+                logic.stop()
+            # don't wait for mazes being made for levels that won't be played
+            PREBUILDER.shutdown(wait=False, cancel_futures=True)
             pygame.quit()
             quit()
+    return events
 
 
 # path finding - bfs is ideal for maze.
-def bfs(start_cell, end_cell, grid):
-    # CREATE A QUEUE TO SEARCH THROUGH THE MAZE 'BREADTH FIRST'
-    Q = fifo()
-    searched = []
-    # STEP 1. MAKE THE START CELL SEARCHED AND PUSH IT TO THE QUEUE
-    searched.append(start_cell)
-    Q.put(start_cell)
-    # CREATE A HASH-MAP TO KEEP TRACK OF WHERE EACH CELL COMES FROM ( ROOT OF EACH CELL ), AND ALL THE SEARCHED CELLS
-    track = {}
-    # KEEP SEARCHING UNTIL A PATH IS FOUND
-    while True:
-        CheckQuit()  # CHECK IF THE USER WANTS TO QUIT PYGAME
-        # STEP 2
-        # POP A CELL FROM THE QUEUE AND ASSIGN IT TO ROOT
-        root = Q.get()
-        # IF ROOT IS THE END CELL, PATH HAS BEEN FOUND
-        if root == end_cell:
-            # BACKTRACK THE PATH FROM THE END CELL TO THE START CELL USING THE HASH-MAP
-            while track[root] != start_cell:
-                CheckQuit()  # CHECK IF THE USER WANTS TO QUIT PYGAME
-
-                # UPDATE ROOT TO BE THE ROOT OF THE CURRENT ROOT CELL
-                root = track[root]
-            # ANNOUNCE THE COMPLETION OF PATH
-            return root
-
-        # IF ROOT HAS ANY NEIGHBOURS, MAKE THEM ALL SEARCHED IF THEY HAVEN'T ALREADY BEEN AND PUSH THEM TO THE QUEUE
-        neighbours = root.get_unsearched_neighbour(grid, searched)
-        if neighbours:
-            for n in neighbours:
-                searched.append(n)
-                track[n] = root
-                Q.put(n)
-
-
-# random colored chaser
-def rand_chaser(image, color):
-    image = image.copy()
-    colorImage = pygame.Surface(image.get_size()).convert_alpha()
-    colorImage.fill(color)
-    image.blit(colorImage, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-    return image
-
-
-# Class Cell. Every element in the grid is a Cell
-class Cell:
-    def __init__(self, row, col, width_buffer=0, height_buffer=0):
-        self.row = row  # ROW NUMBER
-        self.col = col  # COLUMN NUMBER
-        self.y = row * WIDTH + height_buffer  # POSITION X COORDINATE
-        self.x = col * WIDTH + width_buffer  # POSITION Y COORDINATE
-
-        self.visited = False  # IS IT VISITED OR NOT, USED WHILE MAZE MAKING
-        self.searched = False  # IS IT SEARCHED OR NOT, USED WHILE PATH FINDING
-        self.start = False  # IS IT THE START CELL
-        self.end = False  # IS IT THE END CELL
-        self.ispath = False  # DOES THIS CELL COME IN THE PATH
-        self.blank = False
-        # RIGHT, LEFT, TOP AND BOTTOM WALLS. CHANGE TO False TO REMOVE THEM
-        self.right = True
-        self.left = True
-        self.top = True
-        self.bottom = True
-
-        # COLORS USED FOR DRAWING THE CELL,HIGHLIGHTING IT AND DRAWING ITS WALLS
-        self.color = KHAKI
-        self.highlight_color = ORANGE
-        self.line_color = TURQUOISE
-
-        # is this cell the player or the chaser?
-        self.playerHost = False
-        self.chaserHost = False
-        self.point = True
-        self.chaserImg = None
-
-        self._show = False
-
-    def reinit(self):
-        self.visited = False  # IS IT VISITED OR NOT, USED WHILE MAZE MAKING
-        self.searched = False  # IS IT SEARCHED OR NOT, USED WHILE PATH FINDING
-        self.start = False  # IS IT THE START CELL
-        self.end = False  # IS IT THE END CELL
-        self.ispath = False  # DOES THIS CELL COME IN THE PATH
-        self.blank = False
-        # RIGHT, LEFT, TOP AND BOTTOM WALLS. CHANGE TO False TO REMOVE THEM
-        self.right = True
-        self.left = True
-        self.top = True
-        self.bottom = True
-
-        # COLORS USED FOR DRAWING THE CELL,HIGHLIGHTING IT AND DRAWING ITS WALLS
-        self.color = KHAKI
-        self.highlight_color = ORANGE
-        self.line_color = TURQUOISE
-
-        self.playerHost = False
-        self.chaserHost = False
-        self.point = True
-        self.chaserImg = None
-        self._show = False
-
-    # THIS FUNCTION CHECKS ALL UNVISITED NEIGHBOURS OF A CELL AND RETURNS A RANDOM ONE IF IT DOES
-    def get_neighbour(self, grid):
-        neighbours = (
-            []
-        )  # A LIST NEIGHBOURS. TO TEMPORARILY STORE ALL NEIGHBOURS OF A GIVEN CELL
-
-        # THIS PART IS FOR THE MAZE MAKING...HERE THE NEIGHBOURS OF A GIVEN CELL ARE THOSE CELLS WHICH SURROUND IT (TOP,BOTTOM,LEFT,RIGHT)
-        # AND ARE NOT YET VISITED
-        # WALLS IN BETWEEN NEIGHBOURS ARE NOT CONSIDERED
-        # IF THE GIVEN CELL IS NOT THE IN FIRST ROW AND HAS A NON VISITED NEIGHBOUR ABOVE IT, APPEND IT TO NEIGHBOURS
-        if (
-            0 < self.row
-            and not grid[self.row - 1][self.col].visited
-            and not grid[self.row - 1][self.col].blank
-        ):
-            neighbours.append(grid[self.row - 1][self.col])  # top
-
-        # IF THE GIVEN CELL IS NOT THE IN LAST ROW AND HAS A NON VISITED NEIGHBOUR BELOW IT, APPEND IT TO NEIGHBOURS
-        if (
-            rows - 1 > self.row
-            and not grid[self.row + 1][self.col].visited
-            and not grid[self.row + 1][self.col].blank
-        ):
-            neighbours.append(grid[self.row + 1][self.col])  # bottom
-
-        # IF THE GIVEN CELL IS NOT THE IN FIRST COLUMN AND HAS A NON VISITED NEIGHBOUR TO THE LEFT OF IT, APPEND IT TO NEIGHBOURS
-        if (
-            0 < self.col
-            and not grid[self.row][self.col - 1].visited
-            and not grid[self.row][self.col - 1].blank
-        ):
-            neighbours.append(grid[self.row][self.col - 1])  # left
-
-        # IF THE GIVEN CELL IS NOT THE IN LAST COLUMN AND HAS A NON VISITED NEIGHBOUR TO THE RIGHT OF IT, APPEND IT TO NEIGHBOURS
-        if (
-            cols - 1 > self.col
-            and not grid[self.row][self.col + 1].visited
-            and not grid[self.row][self.col + 1].blank
-        ):
-            neighbours.append(grid[self.row][self.col + 1])  # right
-
-        # IF THERE ARE ANY NEIGHBOURS FOR A GIVEN CELL, THEN RETURN A RANDOM ONE, TO RANDOMISE THE FORMATION OF THE MAZE
-        if len(neighbours) > 0:
-            return neighbours[random.randint(0, len(neighbours) - 1)]
-        # IF THERE ARE NO NEIGHBOURS THAT ARE UNVISITED RETURN FALSE
-        return False
-
-    # get all unsearched neighbors for path finding
-    def get_unsearched_neighbour(self, grid, searched):
-        neighbours = (
-            []
-        )  # A LIST NEIGHBOURS. TO TEMPORARILY STORE ALL NEIGHBOURS OF A GIVEN CELL
-
-        # THIS PART IS FOR THE PATH FINDING...HERE THE NEIGHBOURS OF A CELL ARE THOSE THAT SURROUND IT
-        # AND ARE NOT YET SEARCHED
-        # AND THERE MUST BE NO WALL BETWEEN THE TWO NEIGHBOURS
-
-        # IF THERE IS A RIGHT NEIGHBOUR THAT SATISFIES THE CONDITIONS APPEND IT
-        if not self.right and grid[self.row][self.col + 1] not in searched:
-            neighbours.append(grid[self.row][self.col + 1])  # right
+# the search itself lives in pathfinding.py and runs over the packed walls of the grid,
+# it doesn't touch pygame so it is safe on the logic threads.
+# the searcher for the current maze, or a fresh one while the maze is still changing
+def get_searcher(grid):
+    if MAZE_SEARCH is not None:
+        return MAZE_SEARCH
+    return Searcher(grid.store.cells, rows, cols)
+
+
+SEARCH_STRATEGIES = dict(STRATEGIES, junctions=JunctionGraph, hpa=HPAGraph)
+
+
+# the numpy wall arrays of the current maze, built once per maze
+def get_wavefront(grid):
+    if MAZE_SEARCH is None:
+        return wavefront.WavefrontMaze(grid.store.cells, rows, cols)
+    if "wavefront" not in MAZE_STRATEGIES:
+        MAZE_STRATEGIES["wavefront"] = wavefront.WavefrontMaze(MAZE_SEARCH.walls, rows, cols)
+    return MAZE_STRATEGIES["wavefront"]
+
+
+# the named search strategy over the current maze, built once per maze.
+# a fresh one is made every time while the maze is still changing
+def get_strategy(name, grid):
+    if name == "bfs":
+        return get_searcher(grid)
+    if MAZE_SEARCH is None:
+        return SEARCH_STRATEGIES[name](grid.store.cells, rows, cols)
+    if name not in MAZE_STRATEGIES:
+        MAZE_STRATEGIES[name] = SEARCH_STRATEGIES[name](MAZE_SEARCH.walls, rows, cols)
+    return MAZE_STRATEGIES[name]
+
+
+# reverse bfs from the target (player) cell.
+# every reachable cell stores its distance to the target and the neighbour to step to next,
+# so all the chasers can share one search per player move instead of one bfs each.
+# once the next hop table is ready the field is just a lookup into it.
+class DistanceField:
+    def __init__(self, target_cell, grid):
+        self.target = target_cell
+        self.grid = grid
+        self.table = MAZE_TABLE if MAZE_TABLE is not None and MAZE_TABLE.ready else None
+        self.wave = None
+        self.dist = None
+        if self.table is not None:
+            pass
+        elif field_backend == "numpy" and wavefront.available:
+            self.wave = wavefront.WavefrontField(
+                get_wavefront(grid), target_cell.row * cols + target_cell.col
+            )
+            self.dist = self.wave.dist
+        else:
+            searcher = get_searcher(grid)
+            self.walls = searcher.walls
+            self.dist, _ = searcher.field(target_cell.row * cols + target_cell.col)
+
+    # the cell to move to from the given cell, None if the target can't be reached
+    def step(self, cell):
+        if self.table is not None:
+            i = self.table.step(
+                cell.row * cols + cell.col, self.target.row * cols + self.target.col
+            )
+            if i is None:
+                return None
+            return self.grid[i // cols][i % cols]
 
-        # IF THERE IS A BOTTOM NEIGHBOUR THAT SATISFIES THE CONDITIONS APPEND IT
-        if not self.bottom and grid[self.row + 1][self.col] not in searched:
-            neighbours.append(grid[self.row + 1][self.col])  # bottom
+        if self.wave is not None:
+            i = self.wave.step(cell.row * cols + cell.col)
+            if i is None:
+                return None
+            return self.grid[i // cols][i % cols]
 
-        # IF THERE IS A LEFT NEIGHBOUR THAT SATISFIES THE CONDITIONS APPEND IT
-        if not self.left and grid[self.row][self.col - 1] not in searched:
-            neighbours.append(grid[self.row][self.col - 1])  # left
+        # step down the distances the same way Searcher.first_step would
+        i = step_towards(self.walls, cols, self.dist, cell.row * cols + cell.col)
+        if i == -1:
+            return None
+        return self.grid[i // cols][i % cols]
 
-        # IF THERE IS A TOP NEIGHBOUR THAT SATISFIES THE CONDITIONS APPEND IT
-        if not self.top and grid[self.row - 1][self.col] not in searched:
-            neighbours.append(grid[self.row - 1][self.col])  # top
 
-        if len(neighbours) > 0:
-            return neighbours
+# the colors chasers are picked from. a fixed set, so every tint is made once and then comes from the cache
+CHASER_COLORS = [(r, g, b) for r in (128, 192, 255) for g in (128, 192, 255) for b in (128, 192, 255)]
 
-        return False
 
-    # CHANGE THE COLOR OF THE END CELL
-    def make_end(self):
-        self.color = LIGHTBLUE
+# random colored chaser, made once per color
+def rand_chaser(color):
+    return ASSETS.tinted("chaser", color)
 
-    # CHANGE THE COLOR OF THE START CELL
-    def make_start(self):
-        self.color = BROWN
 
-    # CHANGE THE COLOR OF VISITED CELLS,WHEN MAZE IS COMPLETED ALL CELLS BECOME VISITED
-    def make_visited(self):
-        if not self.end and not self.start:
-            self.color = BLACK
+# Class Cell. Every element in the grid is a Cell.
+# a cell is only a view of its byte in the maze store, see maze_store.py
+class Cell:
+    __slots__ = ("store", "index", "row", "col", "x", "y")
+
+    # RIGHT, LEFT, TOP AND BOTTOM WALLS. CHANGE TO False TO REMOVE THEM
+    right = flag_property(RIGHT)
+    left = flag_property(LEFT)
+    top = flag_property(TOP)
+    bottom = flag_property(BOTTOM)
+
+    visited = flag_property(VISITED)  # IS IT VISITED OR NOT, USED WHILE MAZE MAKING
+    blank = flag_property(BLANK)
+    point = flag_property(POINT)
+
+    # COLORS USED FOR HIGHLIGHTING THE CELL AND DRAWING ITS WALLS
+    highlight_color = ORANGE
+    line_color = TURQUOISE
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+        self.row, self.col = divmod(index, store.cols)  # ROW AND COLUMN NUMBER
+        self.y = self.row * WIDTH + HEIGHT_BUFFER  # POSITION Y COORDINATE
+        self.x = self.col * WIDTH + WIDTH_BUFFER  # POSITION X COORDINATE
+
+    # two views of the same cell are the same cell
+    def __eq__(self, other):
+        return (
+            isinstance(other, Cell) and other.index == self.index and other.store is self.store
+        )
 
-    # CHANGE THE COLOR OF THOSE CELLS THAT COME IN THE PATH FROM START TO END
-    def make_path(self):
-        if not self.end and not self.start:
-            self.color = PURPLE
+    def __hash__(self):
+        return self.index
+
+    # COLOR OF THE CELL, VISITED CELLS BECOME BLACK. WHEN THE MAZE IS COMPLETED ALL CELLS ARE VISITED
+    @property
+    def color(self):
+        return BLACK if self.visited else KHAKI
+
+    # is this cell the player or the chaser?
+    @property
+    def playerHost(self):
+        return self.store.player == self.index
+
+    @playerHost.setter
+    def playerHost(self, on):
+        if on:
+            self.store.player = self.index
+        elif self.store.player == self.index:
+            self.store.player = -1
+
+    @property
+    def chaserHost(self):
+        return self.index in self.store.chasers
+
+    @chaserHost.setter
+    def chaserHost(self, on):
+        if not on:
+            self.store.chasers.pop(self.index, None)
+
+    @property
+    def chaserImg(self):
+        return self.store.chasers.get(self.index, (None, None, None))[0]
+
+    # the chaser's cached path to the player
+    @property
+    def chaserPath(self):
+        return self.store.chasers.get(self.index, (None, None, None))[1]
+
+    # how this chaser finds the player, None for chaser_pathing
+    @property
+    def chaserStrategy(self):
+        return self.store.chasers.get(self.index, (None, None, None))[2]
 
     # make it a chaser
-    def make_chaser(self, img):
-        self.chaserHost = True
-        self.chaserImg = img
+    def make_chaser(self, img, path=None, strategy=None):
+        self.store.chasers[self.index] = (
+            img,
+            path if path is not None else CachedPath(),
+            strategy,
+        )
 
     # make player
     def make_player_host(self):
@@ -321,24 +379,47 @@ class Cell:
 
     # HIGHLIGHT ANY CELL FOR DEBUGGING
     def highlight(self, win):
-        pygame.draw.rect(win, self.highlight_color, (self.x, self.y, WIDTH, WIDTH), 0)
-        pygame.display.flip()
+        FRAME.add(pygame.draw.rect(win, self.highlight_color, (self.x, self.y, WIDTH, WIDTH), 0))
 
     # logic to move player or chaser
-    def move(self, grid, player_host):
+    # field is a DistanceField towards player_host shared by all chasers, if there is one.
+    # step is this chaser's next cell when it was already worked out in a batch, -1 if there is none
+    def move(self, grid, player_host, field=None, step=None):
 
         if self.playerHost and self.chaserHost:
             return {"defeat": True}  # game over
 
         # logic for moving chaser
         elif self.chaserHost:
-            new_chaser = bfs(self, player_host, grid)
+            strategy = self.chaserStrategy or chaser_pathing
+            if step is not None:
+                new_chaser = None if step == -1 else grid[step // cols][step % cols]
+            elif MAZE_SEARCH is not None and not MAZE_SEARCH.reachable(
+                self.row * cols + self.col, player_host.row * cols + player_host.col
+            ):
+                new_chaser = None  # cut off from the player, no search can get there
+            elif strategy == "field" and field is not None and field.target == player_host:
+                new_chaser = field.step(self)
+            else:
+                source = self.row * cols + self.col
+                target = player_host.row * cols + player_host.col
+                if strategy == "cached":
+                    step = self.chaserPath.step(get_searcher(grid), source, target)
+                else:
+                    # without a shared field, a "field" chaser runs its own bfs
+                    if strategy == "field":
+                        strategy = "bfs"
+                    step = get_strategy(strategy, grid).first_step(source, target)
+                new_chaser = None if step is None else grid[step // cols][step % cols]
+
+            # the player can't be reached from here, so stay put
+            if new_chaser is None:
+                return {"chaser": self}
 
             # dont want both chasers to merge
             if not new_chaser.chaserHost:
+                new_chaser.make_chaser(self.chaserImg, self.chaserPath, self.chaserStrategy)
                 self.chaserHost = False
-                new_chaser.make_chaser(self.chaserImg)
-                self.chaserImg = None
                 self.show()
                 new_chaser.show()
 
@@ -347,65 +428,84 @@ class Cell:
 
     def show_(self, win, force=False):
         if self._show or force:
-            # DRAW A RECTANGLE WITH THE DIMENSIONS OF THE CELL, TO COLOR IT
-            pygame.draw.rect(win, self.color, (self.x, self.y, WIDTH, WIDTH), 0)
-
-            # DRAW RIGHT, LEFT, TOP, BOTTOM WALLS
-            if self.right:  # RIGHT
-                pygame.draw.line(
-                    win,
-                    self.line_color,
-                    (self.x + WIDTH, self.y),
-                    (self.x + WIDTH, self.y + WIDTH),
-                    width=wallwidth,
-                )
-            if self.left:  # LEFT
-                pygame.draw.line(
-                    win,
-                    self.line_color,
-                    (self.x, self.y),
-                    (self.x, self.y + WIDTH),
-                    width=wallwidth,
-                )
-            if self.top:  # TOP
-                pygame.draw.line(
-                    win,
-                    self.line_color,
-                    (self.x, self.y),
-                    (self.x + WIDTH, self.y),
-                    width=wallwidth,
-                )
-            if self.bottom:  # BOTTOM
-                pygame.draw.line(
-                    win,
-                    self.line_color,
-                    (self.x, self.y + WIDTH),
-                    (self.x + WIDTH, self.y + WIDTH),
-                    width=wallwidth,
-                )
-
-            # draw appropriate images
-            if self.point:
-                pygame.draw.circle(
-                    win, KHAKI, (self.x + WIDTH // 2, self.y + WIDTH // 2), pointRadius
-                )
+            if MAZE_LAYERS is None:
+                self.draw(win)
+            else:
+                # THE FINISHED MAZE IS DRAWN ALREADY, JUST COPY THIS CELL'S PART OF IT
+                MAZE_LAYERS.eat(self)
+                rect = cell_rect(self)
+                win.blit(MAZE_LAYERS.pellets, rect, rect)
             if self.chaserHost:
                 win.blit(self.chaserImg, (self.x + WIDTH // 4, self.y + WIDTH // 4))
 
-            self._show = False
+            self.store.dirty.discard(self.index)
+
+    # DRAW THE CELL WITH ITS WALLS AND POINT, WHILE THE MAZE IS STILL BEING MADE
+    def draw(self, win):
+        # DRAW A RECTANGLE WITH THE DIMENSIONS OF THE CELL, TO COLOR IT
+        pygame.draw.rect(win, self.color, (self.x, self.y, WIDTH, WIDTH), 0)
+
+        # DRAW RIGHT, LEFT, TOP, BOTTOM WALLS
+        if self.right:  # RIGHT
+            pygame.draw.line(
+                win,
+                self.line_color,
+                (self.x + WIDTH, self.y),
+                (self.x + WIDTH, self.y + WIDTH),
+                width=wallwidth,
+            )
+        if self.left:  # LEFT
+            pygame.draw.line(
+                win,
+                self.line_color,
+                (self.x, self.y),
+                (self.x, self.y + WIDTH),
+                width=wallwidth,
+            )
+        if self.top:  # TOP
+            pygame.draw.line(
+                win,
+                self.line_color,
+                (self.x, self.y),
+                (self.x + WIDTH, self.y),
+                width=wallwidth,
+            )
+        if self.bottom:  # BOTTOM
+            pygame.draw.line(
+                win,
+                self.line_color,
+                (self.x, self.y + WIDTH),
+                (self.x + WIDTH, self.y + WIDTH),
+                width=wallwidth,
+            )
 
-    # THIS FUNCTION SHOWS THE CELL ON PYGAME WINDOW
+        # draw appropriate images
+        if self.point:
+            pygame.draw.circle(
+                win, KHAKI, (self.x + WIDTH // 2, self.y + WIDTH // 2), pointRadius
+            )
+
+    # NEEDS TO BE REDRAWN, IT GOES IN THE STORE'S DIRTY SET
+    @property
+    def _show(self):
+        return self.index in self.store.dirty
+
+    # THIS FUNCTION SHOWS THE CELL ON PYGAME WINDOW, ON THE NEXT FRAME
     def show(self):
-        self._show = True
+        self.store.dirty.add(self.index)
 
 
 # Player
-class Player(Cell):
+class Player:
     def __init__(self, host, row, col, width_buffer, height_buffer):
-        super().__init__(row, col, width_buffer, height_buffer)
+        self.row = row
+        self.col = col
+        self.y = row * WIDTH + height_buffer
+        self.x = col * WIDTH + width_buffer
         self.direction = 1
         self.host = host
         self.playerImg = playerR
+        self._show = False
 
     def forward(
         self, grid,
@@ -479,6 +579,9 @@ class Player(Cell):
             win.blit(self.playerImg, (self.x + WIDTH // 4, self.y + WIDTH // 4))
             self._show = False
 
+    def show(self):
+        self._show = True
+
 
 # Simple button class
 class Button(object):
@@ -553,30 +656,200 @@ class Button(object):
             surface.blit(self.image, self.rect)
 
 
-WIN = pygame.display.set_mode((LENGTH, BREADTH))
+# 1 FOR A CELL BYTE WITH A POINT ON IT, 0 OTHERWISE
+HAS_POINT = bytes(1 if b & POINT else 0 for b in range(256))
+
+
+# THE WALLS OF A FINISHED MAZE NEVER CHANGE, SO THEY ARE DRAWN ONCE PER LEVEL ON A SURFACE OF THEIR OWN,
+# EVERY WALL ONCE. A COPY OF IT ALSO HAS THE POINTS, AND ONLY CHANGES WHEN ONE IS EATEN.
+# A CELL IS REDRAWN BY COPYING ITS PART OF THE POINTS LAYER, THE SPRITES GO ON TOP
+class MazeLayers:
+    """The walls and points of a finished maze, drawn off screen."""
+
+    def __init__(self, grid, size):
+        self.grid = grid
+        self.size = size
+        self.walls = pygame.Surface(size)
+        self.walls.fill(BLACK)
+        store = grid.store
+        cells = [grid.cell(i) for i in range(store.size)]
+        # THE BLANK CELLS FIRST, SO NO FILL COVERS A WALL DRAWN BEFORE IT
+        for cell in cells:
+            if cell.blank:
+                self.walls.fill(cell.color, (cell.x, cell.y, WIDTH, WIDTH))
+        # A WALL IS SHARED BY TWO CELLS, EACH CELL DRAWS ITS RIGHT AND BOTTOM ONES,
+        # THE ONES ON THE LEFT AND TOP EDGES OF THE MAZE ARE LEFT TO THE FIRST COLUMN AND ROW
+        for cell in cells:
+            x, y = cell.x, cell.y
+            if cell.right:
+                self.line((x + WIDTH, y), (x + WIDTH, y + WIDTH))
+            if cell.bottom:
+                self.line((x, y + WIDTH), (x + WIDTH, y + WIDTH))
+            if cell.left and cell.col == 0:
+                self.line((x, y), (x, y + WIDTH))
+            if cell.top and cell.row == 0:
+                self.line((x, y), (x + WIDTH, y))
+
+        self.pellets = self.walls.copy()
+        self.drawn = bytearray(bytes(store.cells).translate(HAS_POINT))  # POINTS ON THE LAYER
+        for cell in cells:
+            if self.drawn[cell.index]:
+                pygame.draw.circle(
+                    self.pellets, KHAKI, (cell.x + WIDTH // 2, cell.y + WIDTH // 2), pointRadius
+                )
+
+    def line(self, start, end):
+        pygame.draw.line(self.walls, Cell.line_color, start, end, width=wallwidth)
+
+    # TAKE A CELL'S POINT OFF THE POINTS LAYER ONCE IT'S EATEN
+    def eat(self, cell):
+        if self.drawn[cell.index] and not cell.point:
+            rect = cell_rect(cell)
+            self.pellets.blit(self.walls, rect, rect)
+            self.drawn[cell.index] = 0
+
+    # TAKE EVERY EATEN POINT OFF, BEFORE THE WHOLE LAYER IS SHOWN
+    def eat_all(self):
+        now = bytes(self.grid.store.cells).translate(HAS_POINT)
+        if now != self.drawn:
+            for i, (was, has) in enumerate(zip(self.drawn, now)):
+                if was != has:
+                    self.eat(self.grid.cell(i))
+
+
+# EVERYTHING DRAWN DURING A FRAME IS COLLECTED HERE AND PUT ON THE SCREEN ONCE, WHEN IT ENDS.
+# NOTHING ELSE CALLS pygame.display.flip OR update
+class Frame:
+    """The parts of the window drawn on this frame, presented together."""
+
+    def __init__(self, dirty_rects=True):
+        self.dirty_rects = dirty_rects
+        self.rects = []
+        self.full = False
+        self.frames = 0  # FRAMES ENDED
+        self.presents = 0  # TIMES THE WINDOW WENT TO THE SCREEN, NEVER MORE THAN frames
+
+    # parts of the window were drawn on
+    def add(self, *rects):
+        self.rects.extend(rects)
+
+    # the whole window was drawn on
+    def add_all(self):
+        self.full = True
+
+    # end the frame, with one update of what was drawn on. nothing is presented if nothing was
+    def present(self):
+        self.frames += 1
+        if self.full or (self.rects and not self.dirty_rects):
+            pygame.display.flip()
+            self.presents += 1
+        elif self.rects:
+            pygame.display.update(self.rects)
+            self.presents += 1
+        self.rects = []
+        self.full = False
+
+
+FRAME = Frame(dirty_rect_updates)
 clock = pygame.time.Clock()
 
 
 highscore = 0
+MAZE_SEARCH = None  # bfs over the walls of the finished maze, shared by all the chasers
+MAZE_TABLE = None  # all pairs next hop table of the finished maze, usable once ready
+MAZE_STRATEGIES = {}  # search strategies (and the numpy walls) over the finished maze, by name
+MAZE_SEED = None  # seed of the current level
+MAZE_RNG = random.Random()  # makes the maze and make_easy's holes
+CHASER_RNG = random.Random()  # places and colours the chasers
+MAZE_CACHE = MazeCache(cache_dir, MAX_CACHE_BYTES) if cache_dir else None
+MAZE_LAYERS = None  # the finished maze drawn off screen, None while it is being made
+ENDLESS = None  # the ChunkedMaze of the level in endless mode
+ENDLESS_ORIGIN = [0, 0]  # row and column of the endless maze at the top left of the grid
+# held while the grid is drawn, and while the endless window moves under it
+GRID_LOCK = Lock()
+
+
+# the corpus the mazes come from, if it fits the grid
+def open_corpus():
+    if corpus_path is None:
+        return None
+    corpus = MazeCorpus(corpus_path)
+    if (corpus.rows, corpus.cols) != (rows, cols):
+        print(f"{corpus_path} has {corpus.rows}x{corpus.cols} mazes, not {rows}x{cols}, ignoring it")
+        corpus.close()
+        return None
+    return corpus
+
+
+MAZE_CORPUS = open_corpus()
+NEXT_SEEDS = {}  # level -> seed picked in advance, so its maze can be made before the level starts
+PREBUILT = {}  # seed -> Future of the walls of a maze being made in the background
+
+
+# runs the jobs submitted to it one at a time on a daemon thread, so quitting the game doesn't wait for
+# a maze that's being made for a level nobody will play. a ThreadPoolExecutor joins its threads at exit
+class DaemonExecutor(Executor):
+    def __init__(self, name):
+        self.name = name
+        self.jobs = SimpleQueue()
+        self.thread = None
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        self.jobs.put((future, fn, args, kwargs))
+        if self.thread is None:
+            self.thread = Thread(target=self.work, name=self.name, daemon=True)
+            self.thread.start()
+        return future
+
+    def work(self):
+        while True:
+            future, fn, args, kwargs = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue  # cancelled before it started
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    # the job that's running is left to die with the process, the queued ones are cancelled
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        while cancel_futures and not self.jobs.empty():
+            self.jobs.get()[0].cancel()
+
+
+PREBUILDER = DaemonExecutor("prebuild")  # one maze at a time
+
+
+# build the next hop table on a background thread, the chasers use the distance field until it's done.
+# only "field" chasers read it, so it isn't built when none of them use that
+def precompute_table(walls):
+    global MAZE_TABLE
+    if not precompute_next_hops or (rows * cols) ** 2 > MAX_TABLE_BYTES:
+        return
+    # chaser_strategies are handed out to every chaser when there are any, chaser_pathing otherwise
+    if "field" not in (chaser_strategies or [chaser_pathing]):
+        return
+
+    table = NextHopTable(walls, rows, cols)
+    MAZE_TABLE = table
+
+    def build():
+        if table.build():
+            print(
+                f"Next hop table for {rows}x{cols}: {table.nbytes / 1024:.1f} KB"
+                f" built in {table.build_time:.3f}s"
+            )
+
+    Thread(target=build, name="next-hop-table", daemon=True).start()
 
-# CREATES THE GRID FULL OF CELLS. GRID IS 2D
+# CREATES THE GRID FULL OF CELLS. GRID IS 2D, BACKED BY ONE PACKED MAZE STORE
 def setup(create=False, grid=None):
     if create:
-        grid = []
-        for row in range(rows):
-            grid.append([])
-            for col in range(cols):
-                grid[row].append(
-                    Cell(
-                        row, col, width_buffer=WIDTH_BUFFER, height_buffer=HEIGHT_BUFFER
-                    )
-                )
-        return grid
+        return Grid(MazeStore(rows, cols), Cell)
 
     else:
-        for row in grid:
-            for cell in row:
-                cell.reinit()
+        grid.store.reset()
 
 
 GRID = setup(create=True)  # THE ENTIRE GRID/MAZE STORED IN  A 2D ARRAY
@@ -592,136 +865,126 @@ def change_highscore(s):
 
 # empty off some space in the middle where ghosts live
 def make_den(size=2):
-    for i in range(rows // 2 - 1, rows // 2 + rows % 2 + 1):
-        for j in range(cols // 2 - 1, cols // 2 + cols % 2 + 1):
-            GRID[i][j].blank = True
+    for i in den_cells(rows, cols):
+        GRID.cell(i).blank = True
 
 
 # FUNCTION TO REMOVE A WALL BETWEEN THE CURRENT AND THE NEXT CELL
 def removeWall(curr, next):
-    # r IS THE CURRENT ROW - NEXT ROW AND c IS THE CURRENT COLUMN - NEXT COLUMN
-    r, c = curr.row - next.row, curr.col - next.col
-    # IF c IS 1 WE KNOW THE NEXT CELL IS THE TO THE LEFT OF THE CURRENT CELL
-    if c == 1:
-        curr.left = False
-        next.right = False
-    # IF c IS -1 WE KNOW THE NEXT CELL IS THE TO THE RIGHT OF THE CURRENT CELL
-    if c == -1:
-        next.left = False
-        curr.right = False
-    # IF r IS 1 WE KNOW THE CURRENT CELL IS BELOW THE NEXT CELL
-    if r == 1:
-        next.bottom = False
-        curr.top = False
-    # IF r IS -1 WE KNOW THE CURRENT CELL IS ABOVE THE NEXT CELL
-    if r == -1:
-        curr.bottom = False
-        next.top = False
-
-    # SHOW THE UPDATED VERSIONS OF THE CURRENT AND NEXT CELL
-    if animate_generation:
-        curr.show(WIN, True)
-        next.show(WIN, True)
-        pygame.display.flip()
+    remove_wall(curr.index, next.index)
+
+
+# THE SAME FOR TWO CELL NUMBERS
+def remove_wall(curr, next):
+    GRID.store.remove_wall(curr, next)
 
+    # THE CURRENT AND NEXT CELL NEED TO BE SHOWN AGAIN
+    GRID.cell(curr).show()
+    GRID.cell(next).show()
 
-# THE ALGORITHM FOR CREATING THE MAZE
-def maze_algorithm():
-    all_visited = False
-    paths = {}  # CREATE A DICTIONARY TO STORE ALL THE ROOT CELLS OF EVERY VISITED CELL
 
+# THE ALGORITHM FOR CREATING THE MAZE, maze_generator FROM GENERATORS OVER THE PACKED CELLS.
+# IT IS RUN A FEW STEPS AT A TIME, GIVING THE EVENT LOOP BACK EVERY FRAME,
+# SO THE WINDOW (AND THE BROWSER TAB OF THE WEB BUILD) NEVER FREEZES WHILE IT'S MADE
+async def maze_algorithm():
     # STARTING THE TIMER FOR MAZE MAKING
     start_time = time.time()
 
-    # ---- STEP 1 MAZE MAKER ---- #
-    # MAKE THE START CELL FOR MAZE MAKING (THE CELL TO BEGIN MAKING THE MAZE FROM)
-    # MAKE THE CURRENT CELL THE START CELL
-    # MAKE IT VISITED
-    start = GRID[0][0]
-    current = start
-    current.visited = True
-    current.make_visited()
-
-    # INITIALISE THE STACK FOR BACKTRACKING ( WHEN THERE ARE NO NEIGHBOURS FOR A CELL, BACKTRACK TO A CELL WITH NEIGHBOURS )
-    stack = lifo()
-
-    # --- STEP 2--- #
-    # WHILE THERE ARE UNVISITED CELLS
-    while not all_visited:
-        CheckQuit()  # CHECK IF THE USER WANTS TO QUIT PYGAME
-
-        next = current.get_neighbour(
-            GRID
-        )  # STEP 2.1, A RANDOM UNVISITED NEIGHBOUR. VALUE IS FALSE IF THERE ARE NONE
-        if (
-            next
-        ):  # CONDITION OF STEP 2.1. IF THERE ARE ANY UNVISITED NEIGHBOURS THEN DO THE FOLLOWING
-            stack.put(current)  # STEP 2.1.2... PUSH THE CURRENT CELL TO THE STACK
-            removeWall(
-                current, next
-            )  # STEP 2.1.3... REMOVE THE WALL BETWEEN THE CURRENT AND THE NEXT CELL
-            # STEP 2.1.4... MARK THE CHOSEN CELL AS VISITED AND MAKE IT THE CURRENT CELL
-            next.visited = True
-            next.make_visited()
-            paths[
-                next
-            ] = current  # BEFORE MAKING NEXT CURRENT MAKE CURRENT THE ROOT OF THE NEXT CELL, TO HELP IN PATH FINDING
-            current = next
-
-        elif (
-            stack.qsize() > 0
-        ):  # STEP 2.2... IF THERE ARE NO UNVISITED NEIGHBOURS AND THE STACK SIZE IS NOT ZERO
-            current = (
-                stack.get()
-            )  # STEP 2.2.1. POP A CELL FROM THE STACK AND MAKE IT THE CURRENT CELL
-
-        # SHOW THE UPDATED CURRENT CELL
+    steps = STEPPERS[maze_generator](GRID.store.cells, rows, cols, MAZE_RNG)
+    done = False
+    while not done:
+        frame_start = time.perf_counter()
+        changed = set()
+        done = True
+        # AS MANY STEPS AS FIT IN THE FRAME, OR animation_speed OF THEM WHEN ANIMATING
+        for count, step in enumerate(steps, 1):
+            changed.update(step)
+            if (animate_generation and count >= animation_speed) or (
+                time.perf_counter() - frame_start > generation_budget
+            ):
+                done = False
+                break
+
+        # SHOW ONLY THE CELLS THAT CHANGED
         if animate_generation:
-            current.show(WIN, True)
-            pygame.display.flip()
+            for i in changed:
+                cell = GRID.cell(i)
+                cell.show_(WIN, True)
+                FRAME.add(cell_rect(cell))
+        FRAME.present()
+
+        get_events()
+        await asyncio.sleep(0)
+
+    end_time = time.time()  # END THE TIMER
+    # PRINT THE TIME TAKE TO FIND THE PATH
+    print(f"Time taken to create the maze : {end_time - start_time}")
+
+    # SAVE AN IMAGE OF THE MAZE
+    # pygame.image.save(WIN, 'maze.png')
 
-        # ---- STEP 2 DONE ---- ALGORITHM IS COMPLETE ----
 
-        # IF ALL CELLS ARE VISITED, ANNOUNCE THE COMPLETION OF MAZE TO BE ABLE TO CONTINUE WITH THE PATH FINDING
-        if stack.qsize() == 0:
-            all_visited = True
-            end_time = time.time()  # END THE TIMER
-            # PRINT THE TIME TAKE TO FIND THE PATH
-            print(f"Time taken to create the maze : {end_time - start_time}")
+# THE PART OF THE WINDOW A CELL (OR THE PLAYER ON IT) DRAWS ON, WALLS STICK OUT HALF A WALL
+def cell_rect(cell):
+    return pygame.Rect(cell.x, cell.y, WIDTH, WIDTH).inflate(wallwidth, wallwidth)
 
-            # SAVE AN IMAGE OF THE MAZE
-            # pygame.image.save(WIN, 'maze.png')
 
+# DRAW THE FINISHED MAZE OFF SCREEN, AGAIN IF THE WINDOW CHANGED SIZE
+def draw_layers():
+    global MAZE_LAYERS
+    if MAZE_LAYERS is None or MAZE_LAYERS.size != WIN.get_size():
+        MAZE_LAYERS = MazeLayers(GRID, WIN.get_size())
+    return MAZE_LAYERS
 
-# show all the cells
+
+# show the cells that changed, every cell if force. chasers live on their cells and are
+# redrawn with them. the frame is presented if update, the caller presents it otherwise
 def draw_grid(player=None, chasers=[], force=False, fill=False, update=True):
     if fill:
         WIN.fill(BLACK)
-    for i in range(rows):
-        for j in range(cols):
-            GRID[i][j].show_(WIN, force)
-    if player:
-        player.show_(WIN, force)
+    dirty = GRID.store.dirty
+    drawn = set()
+    if force:
+        dirty.clear()
+        if MAZE_LAYERS is None:
+            for i in range(GRID.store.size):
+                GRID.cell(i).show_(WIN, True)
+        else:
+            layers = draw_layers()
+            layers.eat_all()
+            WIN.blit(layers.pellets, (0, 0))
+            for i in list(GRID.store.chasers):
+                GRID.cell(i).show_(WIN, True)
+        FRAME.add_all()
+    else:
+        # popped one at a time, the logic thread can mark more cells while this runs
+        while dirty:
+            try:
+                i = dirty.pop()
+            except KeyError:
+                break
+            cell = GRID.cell(i)
+            cell.show_(WIN, True)
+            drawn.add(i)
+            FRAME.add(cell_rect(cell))
 
-    for chaser in chasers:
-        chaser.show_(WIN, force)
+    # THE PLAYER GOES ON TOP OF ITS CELL, AGAIN IF THE CELL WAS JUST DRAWN OVER IT
+    if player and (player._show or force or player.host.index in drawn):
+        player.show_(WIN, True)
+        FRAME.add(cell_rect(player))
 
     # blit_pic(centerPic, (WIDTH * (cols // 4) + wallwidth // 2), (WIDTH * (rows // 4)) + wallwidth // 2)
-    write_text(
-        scoreFont,
-        TURQUOISE,
-        f"High Score: {highscore}",
-        LENGTH - max(100, scoreFont.size(f"High Score: {highscore}")[0] + 10),
-        10,
-        True,
-    )
+    if force:
+        score_text.text = None  # wiped with the rest of the window
+    highscore_text.show(f"High Score: {highscore}", force)
 
     if update:
-        pygame.display.update()
+        FRAME.present()
 
 
+# returns the rect the text is drawn on, it goes to the screen with the rest of the frame
 def write_text(font, color, text, x, y, fill=True, center=False):
-    text = font.render(text, True, color)
+    text = render_text(font, text, color)
     textRect = text.get_rect()
 
     if center:
@@ -731,52 +994,222 @@ def write_text(font, color, text, x, y, fill=True, center=False):
     if fill:
         WIN.fill(BLACK, textRect)
     WIN.blit(text, textRect)
-    pygame.display.flip()
+    FRAME.add(textRect)
+    return textRect
+
+
+# A LINE OF THE HUD, DRAWN AGAIN ONLY WHEN ITS TEXT CHANGES.
+# place gives the top left corner of the text from its width
+class HudText:
+    """A line of text on the HUD that is only redrawn when it changes."""
+
+    def __init__(self, font, color, place):
+        self.font = font
+        self.color = color
+        self.place = place
+        self.text = None  # WHAT'S ON THE SCREEN NOW, None TO DRAW IT AGAIN ANYWAY
+        self.rect = None
+
+    # draw text if it isn't there already
+    def show(self, text, force=False):
+        if text == self.text and not force:
+            return
+        rendered = render_text(self.font, text, self.color)
+        rect = rendered.get_rect(topleft=self.place(rendered.get_width()))
+        if self.rect is not None:
+            WIN.fill(BLACK, self.rect)  # THE OLD TEXT CAN BE WIDER
+            FRAME.add(self.rect)
+        WIN.blit(rendered, rect)
+        FRAME.add(rect)
+        self.text = text
+        self.rect = rect
+
+
+score_text = HudText(scoreFont, YELLOW, lambda width: (10, 10))
+highscore_text = HudText(scoreFont, TURQUOISE, lambda width: (LENGTH - max(100, width + 10), 10))
 
 
 # function to randomly remove a few walls to make it easy.
 def make_easy(difficulty=25):  # difficullty: 25 %
-    for i in range(1, rows - 1):
-        for j in range(1, cols - 1):
-            if not GRID[i][j].blank:
-                # 1 in 4 chance to remove each wall
-                removeProbability = [random.randint(0, 3) for _ in range(4)][
-                    : int(4 * (100 - difficulty) / 100)
-                ]
-                if (
-                    GRID[i][j].right
-                    and 0 in removeProbability
-                    and not GRID[i][j + 1].blank
-                ):
-                    removeWall(GRID[i][j], GRID[i][j + 1])
-                if (
-                    GRID[i][j].left
-                    and 0 in removeProbability
-                    and not GRID[i][j - 1].blank
-                ):
-                    removeWall(GRID[i][j], GRID[i][j - 1])
-                if (
-                    GRID[i][j].top
-                    and 0 in removeProbability
-                    and not GRID[i - 1][j].blank
-                ):
-                    removeWall(GRID[i][j], GRID[i - 1][j])
-                if (
-                    GRID[i][j].bottom
-                    and 0 in removeProbability
-                    and not GRID[i + 1][j].blank
-                ):
-                    removeWall(GRID[i][j], GRID[i + 1][j])
+    # 1 in 4 chance (per draw) to knock all the walls off each interior cell, blanks are kept
+    generators.make_easy(GRID.store.cells, rows, cols, MAZE_RNG, difficulty)
+
+
+# the seed a level will be made from
+def level_seed(level):
+    if maze_seed is not None:
+        return maze_seed + level - 1
+    if level not in NEXT_SEEDS:
+        NEXT_SEEDS[level] = random.randrange(2 ** 32)
+    return NEXT_SEEDS[level]
+
+
+# put in the level's maze if it was made in the background or is in the cache, False if it's neither
+def load_maze():
+    if ENDLESS is not None:
+        GRID.store.load_walls(ENDLESS.window(*ENDLESS_ORIGIN, rows, cols))
+        return True
+    if animate_generation:
+        return False
+    start_time = time.time()
+    if MAZE_CORPUS is not None:
+        n = MAZE_SEED % len(MAZE_CORPUS)
+        MAZE_CORPUS.load(n, GRID.store)
+        print(f"Maze {n} of the corpus, ready in {time.time() - start_time:.4f}s")
+        return True
+    walls = None
+    future = PREBUILT.pop(MAZE_SEED, None)
+    # waiting for one that's half made is still quicker than starting over
+    if future is not None and not future.cancel():
+        walls = future.result()
+        source = "made in the background"
+    elif MAZE_CACHE is not None:
+        walls = MAZE_CACHE.get(rows, cols, MAZE_SEED, easy_difficulty, maze_generator)
+        source = "loaded from the cache"
+    if walls is None:
+        return False
+    GRID.store.load_walls(walls)
+    if future is not None:
+        save_maze()
+    print(f"Maze {MAZE_SEED} {source}, ready in {time.time() - start_time:.4f}s")
+    return True
+
+
+# ENDLESS MODE: MOVE THE WINDOW ONTO THE ENDLESS MAZE WHEN THE PLAYER NEARS AN EDGE OF THE GRID.
+# the player ends up in the middle, the points of the cells still in view are kept and the new
+# cells get theirs. chasers that would leave the grid are pulled in to its edge.
+# runs on the logic thread, returns True if the window moved
+def recentre(player, chasers):
+    global MAZE_SEARCH, MAZE_LAYERS
+    top, left = ENDLESS_ORIGIN
+    ENDLESS.ensure_around(top + player.row, left + player.col)  # before the player gets there
+    dr = dc = 0
+    if not endless_margin <= player.row < rows - endless_margin:
+        dr = player.row - rows // 2
+    if not endless_margin <= player.col < cols - endless_margin:
+        dc = player.col - cols // 2
+    if not dr and not dc:
+        return False
+
+    with GRID_LOCK:
+        store = GRID.store
+        ENDLESS_ORIGIN[:] = top + dr, left + dc
+        old = bytes(store.cells)
+        cells = bytearray([POINT]) * store.size
+        keep = bytes(b & POINT for b in range(256))
+        c0, c1 = max(0, -dc), min(cols, cols - dc)
+        for r in range(max(0, -dr), min(rows, rows - dr)):
+            start = (r + dr) * cols + dc
+            cells[r * cols + c0 : r * cols + c1] = old[start + c0 : start + c1].translate(keep)
+        store.cells[:] = cells
+        store.load_walls(ENDLESS.window(*ENDLESS_ORIGIN, rows, cols))
+
+        moved = {}
+        for index, (img, path, strategy) in store.chasers.items():
+            r, c = divmod(index, cols)
+            r, c = min(max(r - dr, 0), rows - 1), min(max(c - dc, 0), cols - 1)
+            # the cached paths are in the old window's cells
+            path.shift(dr, dc, rows, cols)
+            moved.setdefault(r * cols + c, (img, path, strategy))
+        store.chasers.clear()
+        store.chasers.update(moved)
+        store.dirty.clear()
+        chasers[:] = [GRID.cell(i) for i in moved]
+
+        player.change_host(GRID.cell((player.row - dr) * cols + player.col - dc))
+        player.host.make_player_host()
+
+        # new walls, the searches over the old ones are no use
+        MAZE_SEARCH = Searcher(store.cells, rows, cols)
+        MAZE_SEARCH.label_components()
+        MAZE_STRATEGIES.clear()
+        MAZE_LAYERS = None
+    return True
+
+
+# make the mazes that can come after this level on a background thread: the next level and a retry
+def prebuild(level):
+    if not pregenerate or MAZE_CORPUS is not None or endless:
+        return
+    seeds = [seed for seed in (level_seed(level + 1), level_seed(level)) if seed != MAZE_SEED]
+    for seed in list(PREBUILT):
+        if seed not in seeds:
+            PREBUILT.pop(seed).cancel()
+
+    for seed in seeds:
+        if seed in PREBUILT:
+            continue
+        if MAZE_CACHE is not None and MAZE_CACHE.get(
+            rows, cols, seed, easy_difficulty, maze_generator
+        ) is not None:
+            continue
+        PREBUILT[seed] = PREBUILDER.submit(
+            generators.build, rows, cols, seed, easy_difficulty, maze_generator
+        )
+
+
+def save_maze():
+    if MAZE_CACHE is not None:
+        MAZE_CACHE.put(rows, cols, MAZE_SEED, easy_difficulty, maze_generator, GRID.store.walls())
 
 
 def blit_pic(pic, x, y):
-    WIN.blit(pic, (x, y))
-    pygame.display.flip()
+    FRAME.add(WIN.blit(pic, (x, y)))
+
+
+# the free cells in the bottom right quarter where chasers can start.
+# once the maze is built, only the cells the player can be reached from are kept
+def chaser_spots(player_host):
+    spots = sum(
+        [
+            list(filter(lambda spot: not spot.blank and not spot.chaserHost, row[cols // 2 :]))
+            for row in GRID[rows // 2 :]
+        ],
+        [],
+    )
+    if MAZE_SEARCH is not None:
+        target = player_host.row * cols + player_host.col
+        spots = [s for s in spots if MAZE_SEARCH.reachable(s.row * cols + s.col, target)]
+    return spots
+
+
+# chasers are placed before the maze is made, move the ones that ended up cut off from the player
+def move_stranded_chasers(player, chasers):
+    target = player.host.row * cols + player.host.col
+    free_spots = None
+    for ind, c in enumerate(chasers):
+        if MAZE_SEARCH.reachable(c.row * cols + c.col, target):
+            continue
+        if free_spots is None:
+            free_spots = chaser_spots(player.host)
+        if not free_spots:
+            break
+        spot = CHASER_RNG.choice(free_spots)
+        free_spots.remove(spot)
+        spot.make_chaser(c.chaserImg, c.chaserPath, c.chaserStrategy)
+        c.chaserHost = False
+        chasers[ind] = spot
 
 
 # initialise all vars
 def restart(level=1):
+    global MAZE_SEARCH, MAZE_TABLE, MAZE_SEED, MAZE_RNG, CHASER_RNG, MAZE_LAYERS, ENDLESS
     setup(create=False, grid=GRID)
+    MAZE_LAYERS = None  # drawn again once the new maze is made
+    MAZE_SEED = level_seed(level)
+    if endless:
+        ENDLESS = ChunkedMaze(MAZE_SEED, difficulty=easy_difficulty, generator=maze_generator)
+        ENDLESS_ORIGIN[:] = 0, 0
+    NEXT_SEEDS.pop(level, None)  # a retry gets a new maze
+    MAZE_RNG = random.Random(MAZE_SEED)
+    # separate, so the chasers land in the same spots whether the maze is made or loaded
+    CHASER_RNG = random.Random(f"{MAZE_SEED}-chasers")
+    # the walls are about to change
+    MAZE_SEARCH = None
+    MAZE_STRATEGIES.clear()
+    if MAZE_TABLE is not None:
+        MAZE_TABLE.cancel()
+        MAZE_TABLE = None
 
     playerHost = GRID[0][0]
     playerHost.make_player_host()
@@ -786,26 +1219,16 @@ def restart(level=1):
 
     chasers = []
 
-    free_spots = sum(
-        [
-            list(filter(lambda spot: not spot.blank, row[cols // 2 :]))
-            for row in GRID[rows // 2 :]
-        ],
-        [],
-    )
+    free_spots = chaser_spots(playerHost)
 
-    while len(chasers) < level:
-        chaser_temp = random.choice(free_spots)
+    while len(chasers) < level and free_spots:
+        chaser_temp = CHASER_RNG.choice(free_spots)
         free_spots.remove(chaser_temp)
         chaser_temp.make_chaser(
-            rand_chaser(
-                chaserImg,
-                (
-                    random.randint(128, 255),
-                    random.randint(128, 255),
-                    random.randint(128, 255),
-                ),
-            )
+            rand_chaser(CHASER_RNG.choice(CHASER_COLORS)),
+            strategy=chaser_strategies[len(chasers) % len(chaser_strategies)]
+            if chaser_strategies
+            else None,
         )
         chasers.append(chaser_temp)
 
@@ -847,9 +1270,15 @@ class Logic:
     def __init__(self, data, touch):
         self.data = data
         self.__dict__.update(data)
-        self.max_score = self.level * rows * cols
+        # every cell has a point, apart from the blank ones like the den. endless mode has no end
+        self.max_score = (
+            float("inf") if endless else self.level * sum(1 for b in GRID.store.cells if not b & BLANK)
+        )
+        self.scrolled = False  # the endless window moved, the grid has to be drawn again
         self.run = True
         self.touch = touch
+        self.full_searches = 0
+        self.searches_saved = 0
 
     async def move_player(self,):
         while self.run:
@@ -883,6 +1312,7 @@ class Logic:
 
     async def mainloop(self,):
         count = 0
+        field = None  # shared distance field towards the player, rebuilt when the player moves
         while self.run:
             clock.tick(FPS)
             await asyncio.sleep(0)
@@ -912,9 +1342,32 @@ class Logic:
                 self.run = False
                 break
 
+            if ENDLESS is not None and recentre(self.player, self.chasers):
+                self.scrolled = True
+                field = None
+
             if count % self.CHASER_SLOWER == 0:
+                if all((c.chaserStrategy or chaser_pathing) != "field" for c in self.chasers):
+                    field = None
+                elif field is None or field.target != self.player.host:
+                    field = DistanceField(self.player.host, GRID)
+
+                # all the bfs chasers are answered with one search
+                batched = [c for c in self.chasers if (c.chaserStrategy or chaser_pathing) == "bfs"]
+                steps = {}
+                if batched:
+                    steps = dict(
+                        zip(
+                            batched,
+                            get_searcher(GRID).first_steps_to(
+                                [c.row * cols + c.col for c in batched],
+                                self.player.host.row * cols + self.player.host.col,
+                            ),
+                        )
+                    )
+
                 for ind, c in enumerate(self.chasers):
-                    payload = c.move(GRID, self.player.host)
+                    payload = c.move(GRID, self.player.host, field, steps.get(c))
                     new_chaser = payload.get("chaser")
                     defeat = payload.get("defeat")
                     if defeat:
@@ -925,10 +1378,23 @@ class Logic:
                     elif new_chaser:
                         self.chasers[ind] = new_chaser
 
+                self.count_searches()
+
                 count = 0
 
+        if self.full_searches:
+            print(
+                f"Chaser paths: {self.full_searches} full searches,"
+                f" {self.searches_saved} saved by repairs"
+            )
         return
 
+    # add up the searches run and saved by the chasers' cached paths
+    def count_searches(self):
+        paths = [c.chaserPath for c in self.chasers if c.chaserPath is not None]
+        self.full_searches = sum(p.full_searches for p in paths)
+        self.searches_saved = sum(p.searches_saved for p in paths)
+
     def stop(self):
         self.game_over = True
         self.run = False
@@ -936,15 +1402,25 @@ class Logic:
 
 # creates maze and then starts game
 async def main(player, chasers, level):
-    global FPS
+    global FPS, MAZE_SEARCH
     run = True  # WHILE THIS IS TRUE THE MAIN LOOP WILL RUN
 
     pygame.display.set_caption("Creating Maze...")
     print("Creating Maze...")
 
-    # CREATE THE MAZE
-    maze_algorithm()
-    make_easy(75)  # randomly remove a few walls
+    # CREATE THE MAZE, UNLESS IT WAS MADE BEFORE
+    if not load_maze():
+        await maze_algorithm()
+        make_easy(easy_difficulty)  # randomly remove a few walls
+        save_maze()
+    # the walls won't change anymore for this level
+    MAZE_SEARCH = Searcher(GRID.store.cells, rows, cols)
+    MAZE_SEARCH.label_components()
+    move_stranded_chasers(player, chasers)
+    if not endless:  # the walls change whenever the endless window moves
+        precompute_table(MAZE_SEARCH.walls)
+    prebuild(level)
+    draw_layers()
     draw_grid(player, force=True, fill=True)
 
     pygame.display.set_caption("Hit space to start game.")
@@ -954,13 +1430,7 @@ async def main(player, chasers, level):
 
     # THE MAIN GUI LOOP
     while run:
-        for event in pygame.event.get():
-            # IF THE USER HITS THE CROSS BUTTON . CLOSE THE WINDOW
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.quit()
-                quit()
-
+        for event in get_events():
             # IF THE USER PRESSES ANY KEY PROCEED TO THE FOLLOWING
             if event.type == pygame.KEYDOWN:
                 if maze_created:  # and event.key == pygame.K_SPACE:
@@ -1040,13 +1510,7 @@ async def game(player, chasers, level, touch):
         clock.tick(FPS)
         await asyncio.sleep(0)
 
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                print("Quit via user interruption")
-                logic.stop()
-                pygame.quit()
-                quit()
-
+        for e in get_events(logic):
             # if e.type == pygame.MOUSEBUTTONDOWN:
             #     pygame.mouse.get_rel()
 
@@ -1066,13 +1530,17 @@ async def game(player, chasers, level, touch):
                 logic.stop()
                 return await main(*restart(level))
 
+        with GRID_LOCK:
+            if logic.scrolled:
+                logic.scrolled = False
+                draw_layers()
+                draw_grid(player=player, force=True, fill=True, update=False)
+            else:
+                draw_grid(player=player, chasers=chasers, update=False)
         pause_play.update(WIN)
         restart_button.update(WIN)
-        write_text(
-            scoreFont, YELLOW, f"Score: {logic.score}", 10, 10, True,
-        )
-
-        draw_grid(player=player, chasers=chasers, update=False)
+        FRAME.add(pause_play.rect, restart_button.rect)
+        score_text.show(f"Score: {logic.score}")
 
         if logic.game_over:
             keys = pygame.key.get_pressed()
@@ -1080,11 +1548,11 @@ async def game(player, chasers, level, touch):
                 return await main(*restart(level))
 
         elif paused:
-            continue
+            pass
 
         elif logic.victory:
             write_text(
-                pygame.font.Font("freesansbold.ttf", 100),
+                get_font("freesansbold.ttf", 100),
                 PURPLE,
                 "You Have Won!",
                 LENGTH // 2,
@@ -1101,7 +1569,7 @@ async def game(player, chasers, level, touch):
 
         elif logic.defeat:
             write_text(
-                pygame.font.Font("freesansbold.ttf", 100),
+                get_font("freesansbold.ttf", 100),
                 PURPLE,
                 "Game Over!",
                 LENGTH // 2,
@@ -1114,7 +1582,8 @@ async def game(player, chasers, level, touch):
             print("Game Over. Hit Enter to Restart.")
             logic.stop()
 
-        pygame.display.update()
+        # WHAT WAS DRAWN THIS FRAME GOES TO THE SCREEN, ONCE
+        FRAME.present()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+# ON DISK CACHE OF FINISHED MAZES
+# a maze is fully described by its wall codes, four bits per cell, so two cells are packed per byte.
+# files are named after (rows, cols, seed, difficulty, generator), and the least recently used ones
+# are deleted once the cache grows past max_bytes. every disk error is treated as a miss,
+# the game just makes the maze again.
+import os
+import struct
+
+MAGIC = b"MAZ2"  # bumped whenever the same seed starts making different mazes
+HEADER = struct.Struct("<4sII")  # magic, rows, cols
+
+# LOW[b] / HIGH[b]: the first / second wall code packed in byte b
+LOW = bytes(b & 15 for b in range(256))
+HIGH = bytes(b >> 4 for b in range(256))
+SHIFT = bytes((b & 15) << 4 for b in range(256))
+
+
+# the wall codes of a maze, two per byte, the first cell in the low nibble
+def pack_nibbles(walls):
+    walls = bytes(walls)
+    if len(walls) % 2:
+        walls += b"\0"
+    low = int.from_bytes(walls[0::2].translate(LOW), "little")
+    high = int.from_bytes(walls[1::2].translate(SHIFT), "little")
+    return (low | high).to_bytes(len(walls) // 2, "little")
+
+
+# the wall codes of size cells, one per byte
+def unpack_nibbles(data, size):
+    walls = bytearray(len(data) * 2)
+    walls[0::2] = data.translate(LOW)
+    walls[1::2] = data.translate(HIGH)
+    return bytes(walls[:size])
+
+
+class MazeCache:
+    """Finished mazes on disk, evicted least recently used first."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, rows, cols, seed, difficulty, generator):
+        return os.path.join(
+            self.directory, f"{rows}x{cols}-{seed}-{difficulty}-{generator}.maze"
+        )
+
+    # the wall codes of a cached maze, None if it isn't cached
+    def get(self, rows, cols, seed, difficulty, generator):
+        path = self.path(rows, cols, seed, difficulty, generator)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mark it as just used
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, r, c = HEADER.unpack_from(data)
+        size = rows * cols
+        if magic != MAGIC or (r, c) != (rows, cols) or len(data) - HEADER.size != (size + 1) // 2:
+            return None
+        return unpack_nibbles(data[HEADER.size :], size)
+
+    # store the wall codes of a finished maze, then evict old mazes until it fits
+    def put(self, rows, cols, seed, difficulty, generator, walls):
+        path = self.path(rows, cols, seed, difficulty, generator)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # written next to it first, so a half written file is never read
+            with open(path + ".tmp", "wb") as f:
+                f.write(HEADER.pack(MAGIC, rows, cols))
+                f.write(pack_nibbles(walls))
+            os.replace(path + ".tmp", path)
+        except OSError:
+            return False
+        self.evict()
+        return True
+
+    # delete the least recently used mazes until the cache fits in max_bytes
+    def evict(self):
+        try:
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".maze"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+        except OSError:
+            pass
+
+    @property
+    def nbytes(self):
+        try:
+            with os.scandir(self.directory) as it:
+                return sum(e.stat().st_size for e in it if e.name.endswith(".maze"))
+        except OSError:
+            return 0
@@ -0,0 +1,123 @@
+# CORPUS OF PRE MADE MAZES IN ONE FILE, OPENED WITH MMAP
+# a header, then one fixed size record per maze: its seed, difficulty and den flag, then its wall codes
+# packed two cells per byte. maze n sits at a known offset, so it is read straight out of the mapping
+# without reading the rest of the file, and unpacked with translate, not cell by cell.
+# usage: python maze_corpus.py out.corpus --rows 15 --cols 20 --count 100000 [--den] [--workers 4]
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import struct
+import time
+
+from generators import NO_BLANKS, build, pool_context
+from maze_cache import pack_nibbles, unpack_nibbles
+from maze_store import BLANK, den_cells
+
+MAGIC = b"MZC1"
+HEADER = struct.Struct("<4sIIQI16s")  # magic, rows, cols, count, record size, generator
+META = struct.Struct("<QBB")  # seed, difficulty, den
+
+
+def record_size(rows, cols):
+    return META.size + (rows * cols + 1) // 2
+
+
+# one record, run in a worker process
+def _record(job):
+    rows, cols, seed, difficulty, generator, den = job
+    walls = build(rows, cols, seed, difficulty, generator, den)
+    return META.pack(seed, difficulty, den) + pack_nibbles(walls)
+
+
+# write count mazes made from the seeds first_seed, first_seed + 1, ... to path
+def write_corpus(
+    path, rows, cols, count, first_seed=0, difficulty=75, generator="dfs", den=False, workers=1
+):
+    jobs = (
+        (rows, cols, first_seed + n, difficulty, generator, den) for n in range(count)
+    )
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, rows, cols, count, record_size(rows, cols), generator.encode()))
+        if workers == 1:
+            f.writelines(map(_record, jobs))
+        else:
+            with ProcessPoolExecutor(workers, mp_context=pool_context()) as pool:
+                f.writelines(pool.map(_record, jobs, chunksize=256))
+
+
+class MazeCorpus:
+    """Read only view of a corpus file, maze n is corpus[n]."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, self.cols, self.count, self.record_size, generator = HEADER.unpack_from(
+            self.mm
+        )
+        if magic != MAGIC or self.record_size != record_size(self.rows, self.cols):
+            self.mm.close()
+            raise ValueError(f"{path} is not a maze corpus")
+        if len(self.mm) < HEADER.size + self.count * self.record_size:
+            self.mm.close()
+            raise ValueError(f"{path} is cut short")
+        self.generator = generator.rstrip(b"\0").decode()
+
+    def __len__(self):
+        return self.count
+
+    def _offset(self, n):
+        if not 0 <= n < self.count:
+            raise IndexError("maze out of range")
+        return HEADER.size + n * self.record_size
+
+    # (seed, difficulty, den) of maze n
+    def meta(self, n):
+        return META.unpack_from(self.mm, self._offset(n))
+
+    # wall codes of maze n, one byte per cell
+    def __getitem__(self, n):
+        start = self._offset(n)
+        return unpack_nibbles(
+            self.mm[start + META.size : start + self.record_size], self.rows * self.cols
+        )
+
+    # put maze n into a fresh (reset) maze store, den included. returns its (seed, difficulty, den)
+    def load(self, n, store):
+        meta = self.meta(n)
+        if meta[2]:
+            for i in den_cells(self.rows, self.cols):
+                store.cells[i] |= BLANK
+        store.load_walls(self[n])
+        return meta
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="write a corpus of pre made mazes")
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=15)
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first maze")
+    parser.add_argument("--difficulty", type=int, default=75)
+    parser.add_argument("--generator", default="dfs")
+    parser.add_argument("--den", action="store_true", help="leave the den in the middle out")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    if args.den and args.generator in NO_BLANKS:
+        parser.error(f"--den can't be used with the {args.generator} generator")
+
+    start = time.perf_counter()
+    write_corpus(
+        args.path, args.rows, args.cols, args.count, args.seed, args.difficulty,
+        args.generator, args.den, args.workers,
+    )
+    print(f"{args.count} mazes written to {args.path} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,147 @@
+# PACKED MAZE STORE
+# the whole maze is one bytearray with a byte per cell, indexed by row * cols + col.
+# the low four bits are the walls (the same bits pathfinding.py reads), the high four are flags.
+# a 2000x2000 maze takes 4 MB, and the searchers can read the bytes directly.
+from pathfinding import ALL_WALLS, BOTTOM, LEFT, RIGHT, TOP
+
+VISITED = 16  # USED WHILE MAZE MAKING
+BLANK = 32  # LEFT OUT OF THE MAZE, LIKE THE DEN IN THE MIDDLE
+POINT = 64  # STILL HAS A POINT TO EAT
+WALL_BITS = ALL_WALLS
+
+FRESH = ALL_WALLS | POINT  # every cell before the maze is made
+# a cell's flags without its walls, VISITED unless it's blank
+KEEP_FLAGS = bytes((b & ~WALL_BITS) | (0 if b & BLANK else VISITED) for b in range(256))
+
+
+# the cells of the den in the middle where the chasers live, left out of the maze
+def den_cells(rows, cols):
+    return [
+        i * cols + j
+        for i in range(rows // 2 - 1, rows // 2 + rows % 2 + 1)
+        for j in range(cols // 2 - 1, cols // 2 + cols % 2 + 1)
+    ]
+
+
+# remove the wall between the neighbouring cells a and b of a packed maze.
+# up and down come first, in a single column maze they are the only neighbours
+def remove_wall(cells, cols, a, b):
+    d = b - a
+    if d == cols:
+        cells[a] &= ~BOTTOM
+        cells[b] &= ~TOP
+    elif d == -cols:
+        cells[a] &= ~TOP
+        cells[b] &= ~BOTTOM
+    elif d == 1:
+        cells[a] &= ~RIGHT
+        cells[b] &= ~LEFT
+    elif d == -1:
+        cells[a] &= ~LEFT
+        cells[b] &= ~RIGHT
+
+
+# put the walls of a finished maze into packed cells in place, keeping their other flags and
+# marking every non blank cell VISITED, the same as making it would
+def merge_walls(cells, walls):
+    flags = bytes(cells).translate(KEEP_FLAGS)
+    cells[:] = (int.from_bytes(flags, "little") | int.from_bytes(walls, "little")).to_bytes(
+        len(cells), "little"
+    )
+
+
+class MazeStore:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.cells = bytearray([FRESH]) * self.size
+        self.player = -1  # cell the player is on
+        self.chasers = {}  # cell -> (image, cached path, strategy) of every chaser
+        self.dirty = set()  # cells that changed since the last frame and need to be redrawn
+
+    # back to a grid full of walls. the bytearray is reused, so anything reading it stays valid
+    def reset(self):
+        self.cells[:] = bytes([FRESH]) * self.size
+        self.player = -1
+        self.chasers.clear()
+        self.dirty.clear()
+
+    # remove the wall between the neighbouring cells a and b
+    def remove_wall(self, a, b):
+        remove_wall(self.cells, self.cols, a, b)
+
+    # just the wall bits, one byte per cell
+    def walls(self):
+        return bytes(self.cells).translate(bytes(b & WALL_BITS for b in range(256)))
+
+    # put the walls of a finished maze in, see merge_walls
+    def load_walls(self, walls):
+        merge_walls(self.cells, walls)
+
+
+# a property reading and writing one bit of a cell view's byte
+def flag_property(bit):
+    def get(self):
+        return bool(self.store.cells[self.index] & bit)
+
+    def set(self, on):
+        if on:
+            self.store.cells[self.index] |= bit
+        else:
+            self.store.cells[self.index] &= ~bit
+
+    return property(get, set)
+
+
+class Row:
+    def __init__(self, grid, row):
+        self.grid = grid
+        self.row = row
+
+    def __len__(self):
+        return self.grid.store.cols
+
+    def __getitem__(self, col):
+        cols = self.grid.store.cols
+        if isinstance(col, slice):
+            return [self.grid.cell(self.row * cols + c) for c in range(*col.indices(cols))]
+        if col < 0:
+            col += cols
+        if not 0 <= col < cols:
+            raise IndexError("column out of range")
+        return self.grid.cell(self.row * cols + col)
+
+    def __iter__(self):
+        return (self[col] for col in range(len(self)))
+
+
+class Grid:
+    """2D access to a MazeStore, grid[row][col] gives a cell view.
+
+    Views are made on demand and compare equal when they look at the same
+    cell, so nothing per cell is kept besides the store's byte.
+    """
+
+    def __init__(self, store, cell_class):
+        self.store = store
+        self.cell_class = cell_class
+
+    def cell(self, index):
+        return self.cell_class(self.store, index)
+
+    def __len__(self):
+        return self.store.rows
+
+    def __getitem__(self, row):
+        rows = self.store.rows
+        if isinstance(row, slice):
+            return [Row(self, r) for r in range(*row.indices(rows))]
+        if row < 0:
+            row += rows
+        if not 0 <= row < rows:
+            raise IndexError("row out of range")
+        return Row(self, row)
+
+    def __iter__(self):
+        return (Row(self, row) for row in range(self.store.rows))
@@ -0,0 +1,86 @@
+# ALL PAIRS NEXT HOP TABLE FOR A MAZE WHOSE WALLS DON'T CHANGE ANYMORE
+# one byte per (target, source) pair holding the direction code (1 right, 2 left, 3 down, 4 up)
+# to step in from source to get closer to target. 0 means stay: source is the target or can't reach it.
+from array import array
+import time
+from itertools import islice
+
+from pathfinding import BOTTOM, LEFT, RIGHT, TOP
+
+STAY, GO_RIGHT, GO_LEFT, GO_DOWN, GO_UP = 0, 1, 2, 3, 4
+
+
+class NextHopTable:
+    def __init__(self, walls, rows, cols):
+        self.walls = walls
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.table = bytearray(self.size * self.size)
+        self.offsets = (0, 1, -1, cols, -cols)  # index change for every direction code
+        self.ready = False
+        self.cancelled = False
+        self.build_time = None
+
+    @property
+    def nbytes(self):
+        return len(self.table)
+
+    # fill the table with one reverse bfs per target. safe to run on a background thread,
+    # lookups only start once ready is set.
+    # every cell steps to the first open neighbour one step closer, looking right, down, left, up,
+    # the same choice step_towards and Searcher.first_step make
+    def build(self):
+        start_time = time.time()
+        walls, cols, size, table = self.walls, self.cols, self.size, self.table
+        unreached = array("i", [-1]) * size
+        dist = array("i", unreached)
+        for target in range(size):
+            if self.cancelled:
+                return False
+            base = target * size
+            dist[:] = unreached
+            dist[target] = 0
+            # the cells in the order bfs reaches them, also the bfs queue: it grows while it's read
+            order = [target]
+            for root in order:
+                d = dist[root] + 1
+                w = walls[root]
+                if not w & RIGHT and dist[root + 1] == -1:
+                    dist[root + 1] = d
+                    order.append(root + 1)
+                if not w & BOTTOM and dist[root + cols] == -1:
+                    dist[root + cols] = d
+                    order.append(root + cols)
+                if not w & LEFT and dist[root - 1] == -1:
+                    dist[root - 1] = d
+                    order.append(root - 1)
+                if not w & TOP and dist[root - cols] == -1:
+                    dist[root - cols] = d
+                    order.append(root - cols)
+
+            for cell in islice(order, 1, None):
+                d = dist[cell] - 1
+                w = walls[cell]
+                if not w & RIGHT and dist[cell + 1] == d:
+                    table[base + cell] = GO_RIGHT
+                elif not w & BOTTOM and dist[cell + cols] == d:
+                    table[base + cell] = GO_DOWN
+                elif not w & LEFT and dist[cell - 1] == d:
+                    table[base + cell] = GO_LEFT
+                else:
+                    table[base + cell] = GO_UP
+
+        self.build_time = time.time() - start_time
+        self.ready = True
+        return True
+
+    def cancel(self):
+        self.cancelled = True
+
+    # the cell to step to from source towards target, None if target can't be reached
+    def step(self, source, target):
+        code = self.table[target * self.size + source]
+        if code == STAY:
+            return source if source == target else None
+        return source + self.offsets[code]
@@ -0,0 +1,483 @@
+# PATH FINDING OVER PACKED WALL DATA
+# every cell is a small int with one bit per wall, and cells are indexed by row * cols + col.
+# the outer walls of the maze are always present, so stepping through an open wall never leaves the grid.
+# nothing here imports pygame or has side effects, so searches can run on any thread, and the walls
+# are a plain bytearray that pickles cheaply for a subprocess.
+import heapq
+from array import array
+from collections import deque  # FIFO WITHOUT LOCKS, ONLY ONE THREAD OWNS A SEARCH
+
+# WALL BITS. DIRECTION CODES 1-4 (RIGHT, LEFT, DOWN, UP) USED BY THE PLAYER MAP TO 1 << (code - 1)
+RIGHT = 1
+LEFT = 2
+BOTTOM = 4
+TOP = 8
+ALL_WALLS = RIGHT | LEFT | BOTTOM | TOP
+
+
+# all the cells reachable in one step from cell i
+def open_neighbours(walls, cols, i):
+    w = walls[i]
+    if not w & RIGHT:
+        yield i + 1
+    if not w & BOTTOM:
+        yield i + cols
+    if not w & LEFT:
+        yield i - 1
+    if not w & TOP:
+        yield i - cols
+
+
+# label every cell with the number of its connected component, one flood fill per component
+def components(walls, rows, cols):
+    size = rows * cols
+    label = array("i", [-1]) * size
+    count = 0
+    for start in range(size):
+        if label[start] != -1:
+            continue
+        label[start] = count
+        stack = [start]
+        while stack:
+            root = stack.pop()
+            for n in open_neighbours(walls, cols, root):
+                if label[n] == -1:
+                    label[n] = count
+                    stack.append(n)
+        count += 1
+    return label
+
+
+class Searcher:
+    """Breadth first search over a fixed maze.
+
+    Visited marks are a per-search generation stamp, so nothing has to be
+    cleared between searches and every search is linear in the cells it expands.
+    """
+
+    def __init__(self, walls, rows, cols):
+        self.walls = walls
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.stamp = array("I", [0]) * self.size
+        self.parent = array("i", [-1]) * self.size
+        self.generation = 0
+        self.expanded = 0  # cells popped from the frontier by the last search
+        self.component = None  # connected component of every cell, see label_components
+
+    def _next_generation(self):
+        self.generation += 1
+        if self.generation == 0xFFFFFFFF:
+            # the stamps are about to wrap around, start over
+            self.stamp = array("I", [0]) * self.size
+            self.generation = 1
+        return self.generation
+
+    # label the connected components once, so unreachable ends are turned down without a search
+    def label_components(self):
+        if self.component is None:
+            self.component = components(self.walls, self.rows, self.cols)
+        return self.component
+
+    def reachable(self, a, b):
+        component = self.label_components()
+        return component[a] == component[b]
+
+    # search from start until end is found. parent links are left behind for the backtrack
+    def _search(self, start, end):
+        walls, cols, stamp, parent = self.walls, self.cols, self.stamp, self.parent
+        gen = self._next_generation()
+
+        stamp[start] = gen
+        parent[start] = -1
+        Q = deque((start,))
+        expanded = 0
+        found = False
+        while Q:
+            root = Q.popleft()
+            expanded += 1
+            if root == end:
+                found = True
+                break
+            w = walls[root]
+            if not w & RIGHT and stamp[root + 1] != gen:
+                stamp[root + 1] = gen
+                parent[root + 1] = root
+                Q.append(root + 1)
+            if not w & BOTTOM and stamp[root + cols] != gen:
+                stamp[root + cols] = gen
+                parent[root + cols] = root
+                Q.append(root + cols)
+            if not w & LEFT and stamp[root - 1] != gen:
+                stamp[root - 1] = gen
+                parent[root - 1] = root
+                Q.append(root - 1)
+            if not w & TOP and stamp[root - cols] != gen:
+                stamp[root - cols] = gen
+                parent[root - cols] = root
+                Q.append(root - cols)
+
+        self.expanded = expanded
+        return found
+
+    # the full path from start to end (both included), None if there is none
+    def path(self, start, end):
+        if not self.reachable(start, end):
+            self.expanded = 0
+            return None
+        if not self._search(start, end):
+            return None
+        path = [end]
+        parent = self.parent
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    # the cell to step to from start to get closer to end, None if end can't be reached
+    def first_step(self, start, end):
+        if start == end:
+            return start
+        if not self.reachable(start, end):
+            self.expanded = 0
+            return None
+        if not self._search(start, end):
+            return None
+        parent = self.parent
+        root = end
+        while parent[root] != start:
+            root = parent[root]
+        return root
+
+    # reverse bfs from the target. returns the distance of every cell to the target and the
+    # cell to step to next, both -1 for the cells that can't reach it
+    def field(self, target):
+        walls, cols = self.walls, self.cols
+        dist = array("i", [-1]) * self.size
+        next_hop = array("i", [-1]) * self.size
+
+        dist[target] = 0
+        next_hop[target] = target
+        Q = deque((target,))
+        while Q:
+            root = Q.popleft()
+            d = dist[root] + 1
+            w = walls[root]
+            if not w & RIGHT and dist[root + 1] == -1:
+                dist[root + 1] = d
+                next_hop[root + 1] = root
+                Q.append(root + 1)
+            if not w & BOTTOM and dist[root + cols] == -1:
+                dist[root + cols] = d
+                next_hop[root + cols] = root
+                Q.append(root + cols)
+            if not w & LEFT and dist[root - 1] == -1:
+                dist[root - 1] = d
+                next_hop[root - 1] = root
+                Q.append(root - 1)
+            if not w & TOP and dist[root - cols] == -1:
+                dist[root - cols] = d
+                next_hop[root - cols] = root
+                Q.append(root - cols)
+
+        self.expanded = self.size - dist.count(-1)
+        return dist, next_hop
+
+    # a search from source that labels every cell with the first step on the way to it
+    def _first_steps_from(self, source):
+        walls, cols = self.walls, self.cols
+        first = array("i", [-1]) * self.size
+        first[source] = source
+        Q = deque()
+        for n in open_neighbours(walls, cols, source):
+            if first[n] == -1:
+                first[n] = n
+                Q.append(n)
+        while Q:
+            root = Q.popleft()
+            label = first[root]
+            for n in open_neighbours(walls, cols, root):
+                if first[n] == -1:
+                    first[n] = label
+                    Q.append(n)
+        return first
+
+    # the first step from every source towards one target, from a single reverse search.
+    # -1 for the sources that can't reach it
+    def first_steps_to(self, sources, target):
+        walls, cols = self.walls, self.cols
+        if len(sources) == 1:
+            # a lone search stops as soon as it finds the target
+            step = self.first_step(sources[0], target)
+            return array("i", [-1 if step is None else step])
+        dist, _ = self.field(target)
+        return array("i", (step_towards(walls, cols, dist, s) for s in sources))
+
+    # the first step for every (source, target) query. queries share one search per distinct
+    # target, or per distinct source when there are fewer of those. -1 where there is no path
+    def first_steps(self, queries):
+        steps = array("i", [-1]) * len(queries)
+        by_target, by_source = {}, {}
+        for q, (source, target) in enumerate(queries):
+            by_target.setdefault(target, []).append(q)
+            by_source.setdefault(source, []).append(q)
+
+        if len(by_target) <= len(by_source):
+            for target, qs in by_target.items():
+                sources = [queries[q][0] for q in qs]
+                for q, step in zip(qs, self.first_steps_to(sources, target)):
+                    steps[q] = step
+        else:
+            for source, qs in by_source.items():
+                first = self._first_steps_from(source)
+                for q in qs:
+                    steps[q] = first[queries[q][1]]
+        return steps
+
+
+# the neighbour of cell i one step closer in a distance map, i itself at the target, -1 if unreachable.
+# neighbours are tried in the order a bfs expands them, so this agrees with Searcher.first_step
+def step_towards(walls, cols, dist, i):
+    d = dist[i]
+    if d <= 0:
+        return i if d == 0 else -1
+    for n in open_neighbours(walls, cols, i):
+        if dist[n] == d - 1:
+            return n
+    return -1
+
+
+# is there an opening between the neighbouring cells a and b
+def is_open(walls, cols, a, b):
+    d = b - a
+    if d == 1:
+        return not walls[a] & RIGHT
+    if d == -1:
+        return not walls[a] & LEFT
+    if d == cols:
+        return not walls[a] & BOTTOM
+    if d == -cols:
+        return not walls[a] & TOP
+    return False
+
+
+class CachedPath:
+    """A chaser's path to the player, reused between moves.
+
+    The player moves one cell at a time, so most of the time the old path only
+    needs to grow or shrink by a cell at the player's end. A full search is only
+    run when the chaser or the player leaves the cached route, or after
+    max_repairs repairs in a row so that mazes with loops don't drift too far
+    from the shortest path.
+    """
+
+    def __init__(self, max_repairs=20):
+        self.path = None  # deque of cells from the chaser to the player
+        self.max_repairs = max_repairs
+        self.repairs = 0  # repairs since the last full search
+        self.full_searches = 0
+        self.searches_saved = 0
+
+    def _repair(self, walls, cols, source, target):
+        path = self.path
+        if path is None or self.repairs >= self.max_repairs:
+            return False
+
+        # the chaser has moved along the path since the last call
+        if path[0] != source:
+            if len(path) > 1 and path[1] == source:
+                path.popleft()
+            else:
+                return False
+
+        if path[-1] == target:
+            return True
+        # the player stepped back along the path
+        if len(path) > 1 and path[-2] == target:
+            path.pop()
+        # the player stepped off the end of the path
+        elif is_open(walls, cols, path[-1], target):
+            if target in path:
+                while path[-1] != target:
+                    path.pop()
+            else:
+                path.append(target)
+        else:
+            return False
+
+        self.repairs += 1
+        return True
+
+    # the cell the chaser at source should step to next to reach target, None if it can't
+    def step(self, searcher, source, target):
+        if self._repair(searcher.walls, searcher.cols, source, target):
+            self.searches_saved += 1
+        else:
+            path = searcher.path(source, target)
+            self.full_searches += 1
+            self.repairs = 0
+            if path is None:
+                self.path = None
+                return None
+            self.path = deque(path)
+
+        return self.path[1] if len(self.path) > 1 else source
+
+    # move the path into a view of the same maze dr rows and dc columns further on.
+    # it's dropped when part of it is left outside the view, the counters are kept
+    def shift(self, dr, dc, rows, cols):
+        if self.path is None:
+            return
+        shifted = deque()
+        for cell in self.path:
+            r, c = cell // cols - dr, cell % cols - dc
+            if not (0 <= r < rows and 0 <= c < cols):
+                self.path = None
+                return
+            shifted.append(r * cols + c)
+        self.path = shifted
+
+
+class DijkstraSearcher(Searcher):
+    """Dijkstra over a maze where stepping into a cell has a cost.
+
+    costs holds the cost of entering every cell (all 1 when left out), so
+    terrain like mud or tunnels can slow the chasers down later on.
+    """
+
+    heuristic = False
+
+    def __init__(self, walls, rows, cols, costs=None):
+        super().__init__(walls, rows, cols)
+        self.costs = costs
+        self.min_cost = min(costs) if costs else 1
+        self.g = array("i", [0]) * self.size
+        self.done = array("I", [0]) * self.size
+
+    def _next_generation(self):
+        if self.generation + 1 == 0xFFFFFFFF:
+            self.done = array("I", [0]) * self.size
+        return super()._next_generation()
+
+    def _search(self, start, end):
+        walls, cols, costs = self.walls, self.cols, self.costs
+        stamp, done, parent, g = self.stamp, self.done, self.parent, self.g
+        gen = self._next_generation()
+        er, ec = divmod(end, cols)
+        scale = self.min_cost if self.heuristic else 0
+
+        stamp[start] = gen
+        g[start] = 0
+        parent[start] = -1
+        # ties go to the cell furthest from the start, it is most likely closest to the end
+        heap = [(0, 0, start)]
+        expanded = 0
+        while heap:
+            _, neg_g, root = heapq.heappop(heap)
+            if done[root] == gen:
+                continue
+            done[root] = gen
+            expanded += 1
+            if root == end:
+                self.expanded = expanded
+                return True
+
+            for n in open_neighbours(walls, cols, root):
+                gn = -neg_g + (costs[n] if costs else 1)
+                if stamp[n] != gen or gn < g[n]:
+                    stamp[n] = gen
+                    g[n] = gn
+                    parent[n] = root
+                    if scale:
+                        r, c = divmod(n, cols)
+                        heapq.heappush(heap, (gn + scale * (abs(r - er) + abs(c - ec)), -gn, n))
+                    else:
+                        heapq.heappush(heap, (gn, -gn, n))
+
+        self.expanded = expanded
+        return False
+
+
+# a* with the manhattan distance to the end as heuristic
+class AStarSearcher(DijkstraSearcher):
+    heuristic = True
+
+
+class BidirectionalSearcher(Searcher):
+    """Breadth first search from both ends at once, always growing the smaller frontier."""
+
+    def __init__(self, walls, rows, cols):
+        super().__init__(walls, rows, cols)
+        self.stamp_end = array("I", [0]) * self.size
+        self.parent_end = array("i", [-1]) * self.size  # next cell towards the end
+        self.dist = array("i", [0]) * self.size
+        self.dist_end = array("i", [0]) * self.size
+
+    def _next_generation(self):
+        if self.generation + 1 == 0xFFFFFFFF:
+            self.stamp_end = array("I", [0]) * self.size
+        return super()._next_generation()
+
+    # expand one whole layer of a frontier. returns the next layer and the best meeting cell
+    def _grow(self, frontier, stamp, parent, dist, other_stamp, other_dist, gen):
+        walls, cols = self.walls, self.cols
+        layer = []
+        best, meet = None, -1
+        for root in frontier:
+            d = dist[root] + 1
+            for n in open_neighbours(walls, cols, root):
+                if stamp[n] == gen:
+                    continue
+                stamp[n] = gen
+                parent[n] = root
+                dist[n] = d
+                layer.append(n)
+                if other_stamp[n] == gen and (best is None or d + other_dist[n] < best):
+                    best, meet = d + other_dist[n], n
+        self.expanded += len(frontier)
+        return layer, meet
+
+    def _search(self, start, end):
+        gen = self._next_generation()
+        stamp, parent, dist = self.stamp, self.parent, self.dist
+        stamp_end, parent_end, dist_end = self.stamp_end, self.parent_end, self.dist_end
+
+        stamp[start] = gen
+        parent[start] = -1
+        dist[start] = 0
+        self.expanded = 0
+        if start == end:
+            return True
+        stamp_end[end] = gen
+        parent_end[end] = -1
+        dist_end[end] = 0
+
+        front, front_end = [start], [end]
+        meet = -1
+        while front and front_end and meet == -1:
+            if len(front) <= len(front_end):
+                front, meet = self._grow(front, stamp, parent, dist, stamp_end, dist_end, gen)
+            else:
+                front_end, meet = self._grow(
+                    front_end, stamp_end, parent_end, dist_end, stamp, dist, gen
+                )
+        if meet == -1:
+            return False
+
+        # point the end half of the path back at the start so it can be backtracked from the end
+        cur = meet
+        while cur != end:
+            nxt = parent_end[cur]
+            parent[nxt] = cur
+            cur = nxt
+        return True
+
+
+# every search strategy a chaser can use, by name
+STRATEGIES = {
+    "bfs": Searcher,
+    "astar": AStarSearcher,
+    "bidirectional": BidirectionalSearcher,
+    "dijkstra": DijkstraSearcher,
+}
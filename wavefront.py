@@ -0,0 +1,88 @@
+# NUMPY WAVEFRONT BFS FOR VERY LARGE MAZES
+# the walls are kept as four boolean "is open" arrays, and the whole frontier is grown at once
+# by shifting it through them, so there is no python loop per cell. every step still has a fixed
+# numpy overhead, so it pays off on big open mazes (few, wide layers) and not on long perfect ones.
+# numpy is optional, see available.
+from pathfinding import BOTTOM, LEFT, RIGHT, TOP
+
+try:
+    import numpy as np
+except ImportError:  # the web build and minimal installs don't ship numpy
+    np = None
+
+available = np is not None
+
+
+class WavefrontMaze:
+    def __init__(self, walls, rows, cols):
+        if np is None:
+            raise ImportError("the numpy pathfinding backend needs numpy")
+        self.rows = rows
+        self.cols = cols
+        w = np.frombuffer(bytes(walls), dtype=np.uint8).reshape(rows, cols)
+        self.open_right = (w & RIGHT) == 0
+        self.open_left = (w & LEFT) == 0
+        self.open_down = (w & BOTTOM) == 0
+        self.open_up = (w & TOP) == 0
+
+    # distance of every cell to the target, -1 where it can't be reached.
+    # the frontier is an array of flat cell numbers, grown through the open walls all at once
+    def distances(self, target):
+        cols = self.cols
+        right, left = self.open_right.ravel(), self.open_left.ravel()
+        down, up = self.open_down.ravel(), self.open_up.ravel()
+        dist = np.full(self.rows * cols, -1, dtype=np.int32)
+        dist[target] = 0
+        frontier = np.array([target], dtype=np.intp)
+        d = 0
+        while frontier.size:
+            d += 1
+            grown = np.concatenate(
+                (
+                    frontier[right[frontier]] + 1,
+                    frontier[down[frontier]] + cols,
+                    frontier[left[frontier]] - 1,
+                    frontier[up[frontier]] - cols,
+                )
+            )
+            # a cell can be reached from several frontier cells, keep it once
+            frontier = np.unique(grown[dist[grown] == -1])
+            dist[frontier] = d
+        return dist.reshape(self.rows, cols)
+
+    # the direction code (1 right, 2 left, 3 down, 4 up) to step in from every cell, 0 to stay
+    def directions(self, dist):
+        codes = np.zeros(dist.shape, dtype=np.uint8)
+        closer = dist - 1
+        # ties go to right, down, left, up in that order, the same as a bfs, so they are written last
+        codes[1:, :][self.open_up[1:, :] & (dist[:-1, :] == closer[1:, :]) & (dist[1:, :] > 0)] = 4
+        codes[:, 1:][self.open_left[:, 1:] & (dist[:, :-1] == closer[:, 1:]) & (dist[:, 1:] > 0)] = 2
+        codes[:-1, :][self.open_down[:-1, :] & (dist[1:, :] == closer[:-1, :]) & (dist[:-1, :] > 0)] = 3
+        codes[:, :-1][self.open_right[:, :-1] & (dist[:, 1:] == closer[:, :-1]) & (dist[:, :-1] > 0)] = 1
+        return codes
+
+
+class WavefrontField:
+    """Distance map towards one target, read one chaser at a time."""
+
+    def __init__(self, maze, target):
+        self.maze = maze
+        self.target = target
+        self.dist = maze.distances(target)
+
+    # the cell to step to from source, None if the target can't be reached
+    def step(self, source):
+        maze, dist, cols = self.maze, self.dist, self.maze.cols
+        r, c = divmod(source, cols)
+        d = dist[r, c]
+        if d == 0:
+            return source
+        if d == -1:
+            return None
+        if maze.open_right[r, c] and dist[r, c + 1] == d - 1:
+            return source + 1
+        if maze.open_down[r, c] and dist[r + 1, c] == d - 1:
+            return source + cols
+        if maze.open_left[r, c] and dist[r, c - 1] == d - 1:
+            return source - 1
+        return source - cols